@@ -9,6 +9,13 @@ class ApplicationSettings(str, Enum):
     SMTP_PORT = 'smtp_port'
     SMTP_USERNAME = 'smtp_username'
     SMTP_PASSWORD = 'smtp_password'
+    NOTIFICATION_RETENTION_DAYS = 'notification_retention_days'
+    NOTIFICATION_RETENTION_MODE = 'notification_retention_mode'
+
+class RetentionMode(str, Enum):
+    ARCHIVE = 'archive'
+    DELETE = 'delete'
+    OFF = 'off'
 
 class VerificationMethod(str, Enum):
     NONE = 'none'
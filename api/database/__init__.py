@@ -1,2 +1,8 @@
-from .engine import get_async_db, get_async_session, get_redis, get_sync_session  # noqa: F401
+from .engine import (  # noqa: F401
+    get_async_session,
+    get_redis,
+    get_sync_session,
+    read_and_release,
+    release_connection,
+)
 
@@ -0,0 +1,33 @@
+# pyright: reportAttributeAccessIssue=false
+
+"""User soft delete
+
+Revision ID: 2b7e9c0d5f14
+Revises: 8f1c4d6a2e37
+Create Date: 2026-10-19 14:02:51.117630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b7e9c0d5f14'
+down_revision: Union[str, None] = '8f1c4d6a2e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_users_deleted_at'), 'users', ['deleted_at'])
+    # Lets the user purge job find the notifications a user triggered without scanning the table
+    op.create_index('ix_notifications_triggered_by', 'notifications', ['triggered_by'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_triggered_by', table_name='notifications')
+    op.drop_index(op.f('ix_users_deleted_at'), table_name='users')
+    op.drop_column('users', 'deleted_at')
@@ -0,0 +1,63 @@
+# pyright: reportAttributeAccessIssue=false
+
+"""Partition notifications by month
+
+Revision ID: 5d2b8e4c1a90
+Revises: c3e9a1f07b42
+Create Date: 2026-10-19 11:04:27.552910
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from api.database.partition import add_months, month_start, monthly_partitions
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2b8e4c1a90'
+down_revision: Union[str, None] = 'c3e9a1f07b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def foreign_key_names(conn) -> list[str]:
+    result = conn.execute(sa.text(
+        "SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'notifications' AND CONSTRAINT_TYPE = 'FOREIGN KEY'"
+    ))
+    return [row[0] for row in result]
+
+
+def upgrade() -> None:
+    # Replaces the single column index of the dropped foreign key
+    op.create_index('ix_notifications_user_id_created_at', 'notifications', ['user_id', 'created_at'])
+
+    conn = op.get_bind()
+    if conn.dialect.name != 'mysql':
+        return
+
+    # Partitioned tables cannot have foreign keys and the partition column must be part of the primary key
+    for name in foreign_key_names(conn):
+        op.drop_constraint(name, 'notifications', type_='foreignkey')
+    op.execute('ALTER TABLE notifications DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)')
+
+    oldest = conn.execute(sa.text('SELECT MIN(created_at) FROM notifications')).scalar()
+    first = month_start(oldest or date.today())
+    last = add_months(month_start(date.today()), MONTHS_AHEAD)
+    partitions = ',\n    '.join(monthly_partitions(first, last))
+    op.execute(f'ALTER TABLE notifications PARTITION BY RANGE (TO_DAYS(created_at)) (\n    {partitions}\n)')
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name == 'mysql':
+        op.execute('ALTER TABLE notifications REMOVE PARTITIONING')
+        op.execute('ALTER TABLE notifications DROP PRIMARY KEY, ADD PRIMARY KEY (id)')
+    op.drop_index('ix_notifications_user_id_created_at', table_name='notifications')
+    if conn.dialect.name == 'mysql':
+        op.create_foreign_key(None, 'notifications', 'users', ['user_id'], ['id'])
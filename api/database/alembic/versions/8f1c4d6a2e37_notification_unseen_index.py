@@ -0,0 +1,28 @@
+# pyright: reportAttributeAccessIssue=false
+
+"""Notification unseen index
+
+Revision ID: 8f1c4d6a2e37
+Revises: 5d2b8e4c1a90
+Create Date: 2026-10-19 13:26:08.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f1c4d6a2e37'
+down_revision: Union[str, None] = '5d2b8e4c1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lets see_all walk the unseen notifications of a user in id order
+    op.create_index('ix_notifications_user_id_seen_id', 'notifications', ['user_id', 'seen', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_user_id_seen_id', table_name='notifications')
@@ -0,0 +1,68 @@
+# pyright: reportAttributeAccessIssue=false
+
+"""Notification retention
+
+Revision ID: c3e9a1f07b42
+Revises: a6f6335fa44e
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9a1f07b42'
+down_revision: Union[str, None] = 'a6f6335fa44e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('notifications_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('triggered_by', sa.Integer(), nullable=False),
+        sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('body', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('category', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('seen', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notifications_archive_user_id', 'notifications_archive', ['user_id'])
+
+    # Lets the retention job find the newest id old enough without scanning the table
+    op.create_index('ix_notifications_created_at', 'notifications', ['created_at'])
+
+    application_settings_table = sa.table('application_settings',
+        sa.column('name', sa.String()),
+        sa.column('value', sa.String()),
+    )
+    op.bulk_insert(
+        application_settings_table, [
+            {
+                'name': 'notification_retention_days',
+                'value': '90',
+            },
+            {
+                'name': 'notification_retention_mode',
+                'value': 'archive',
+            },
+        ]
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DELETE FROM application_settings "
+        "WHERE name IN ('notification_retention_days', 'notification_retention_mode')"
+    )
+    op.drop_index('ix_notifications_created_at', table_name='notifications')
+    op.drop_index('ix_notifications_archive_user_id', table_name='notifications_archive')
+    op.drop_table('notifications_archive')
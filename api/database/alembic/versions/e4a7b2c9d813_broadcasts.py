@@ -0,0 +1,52 @@
+# pyright: reportAttributeAccessIssue=false
+
+"""Broadcasts
+
+Revision ID: e4a7b2c9d813
+Revises: 2b7e9c0d5f14
+Create Date: 2026-10-19 15:37:19.640382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7b2c9d813'
+down_revision: Union[str, None] = '2b7e9c0d5f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('broadcasts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('role', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('triggered_by', sa.Integer(), nullable=False),
+        sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('body', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('category', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_broadcasts_role_created_at', 'broadcasts', ['role', 'created_at'])
+
+    op.create_table('broadcast_receipts',
+        sa.Column('broadcast_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('seen_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['broadcast_id'], ['broadcasts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('broadcast_id', 'user_id')
+    )
+    op.create_index(op.f('ix_broadcast_receipts_user_id'), 'broadcast_receipts', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_broadcast_receipts_user_id'), table_name='broadcast_receipts')
+    op.drop_table('broadcast_receipts')
+    op.drop_index('ix_broadcasts_role_created_at', table_name='broadcasts')
+    op.drop_table('broadcasts')
@@ -0,0 +1,46 @@
+from typing import Annotated
+
+from fastapi import Depends
+from loguru import logger
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.requests import Request
+
+from .engine import async_engine, release_connection, replica_set, set_read_only
+from .routing import READ_ONLY, REPLICA_ALLOWED, RoutingSession
+from .unit_of_work import get_query_count
+
+
+READ_ONLY_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+async def get_async_db(request: Request):
+    # FastAPI caches this dependency per request, so the authentication dependencies and the
+    # handler share one session (and one identity map) for the whole request. Handlers declare
+    # how they use it with `get_async_read_db` or `get_async_write_db`.
+    replica_set.ensure_monitor()
+    async with AsyncSession(
+        async_engine,
+        sync_session_class=RoutingSession,
+        expire_on_commit=False,
+    ) as session:
+        session.info[REPLICA_ALLOWED] = request.method in READ_ONLY_METHODS
+        set_read_only(session, request.method in READ_ONLY_METHODS)
+        yield session
+        logger.debug(f'Request session executed {get_query_count(session)} queries')
+
+
+async def get_async_read_db(session: Annotated[AsyncSession, Depends(get_async_db)]):
+    """
+    The request session for handlers that only read: autoflush is off, on MySQL transactions are
+    started READ ONLY, and `release_connection` may end them as soon as the rows are loaded.
+    """
+    set_read_only(session, True)
+    return session
+
+
+async def get_async_write_db(session: Annotated[AsyncSession, Depends(get_async_db)]):
+    """The request session for handlers that write, its objects are not expired by commits."""
+    if session.info.get(READ_ONLY):
+        await release_connection(session)
+        set_read_only(session, False)
+    return session
@@ -1,20 +1,26 @@
-from contextlib import asynccontextmanager, contextmanager
+from contextlib import asynccontextmanager, contextmanager, nullcontext
 
-from redis import Redis
 from settings import settings
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from api.metrics import InstrumentedRedis, instrument_pool
+
+from .pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
+from .querystats import instrument_engine
+from .routing import READ_ONLY, STICKY_PRIMARY, Replica, ReplicaSet, RoutingSession, read_replica
+
 
 sync_engine = create_engine(
     settings.DATABASE_URL,
     echo=False,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=60,
-    pool_recycle=1800,
+    poolclass=TimedQueuePool,
+    **settings.pool_profile.model_dump(),
 )
+instrument_engine(sync_engine)
+instrument_pool(sync_engine, 'sync')
+sync_engine.pool.slow_checkout_ms = settings.DB_POOL_SLOW_CHECKOUT_MS # type: ignore
 
 
 def init_sync_db():
@@ -29,25 +35,70 @@ def get_sync_db():
 async_engine = create_async_engine(
     settings.DATABASE_URL_ASYNC,
     echo=False,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=60,
-    pool_recycle=1800,
+    poolclass=TimedAsyncAdaptedQueuePool,
+    **settings.pool_profile.model_dump(),
+)
+instrument_engine(async_engine.sync_engine)
+instrument_pool(async_engine.sync_engine, 'async')
+async_engine.pool.slow_checkout_ms = settings.DB_POOL_SLOW_CHECKOUT_MS # type: ignore
+
+
+replica_set = ReplicaSet(
+    [],
+    max_lag=settings.DB_REPLICA_MAX_LAG_S,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL_S,
 )
+for index, url in enumerate(settings.DATABASE_REPLICA_URLS_ASYNC):
+    replica_engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        **settings.pool_profile.model_dump(),
+    )
+    instrument_engine(replica_engine.sync_engine)
+    instrument_pool(replica_engine.sync_engine, f'replica{index}')
+    replica_engine.pool.slow_checkout_ms = settings.DB_POOL_SLOW_CHECKOUT_MS # type: ignore
+    replica_set.replicas.append(Replica(f'replica{index}', replica_engine))
 
+if replica_set.replicas:
+    RoutingSession.replica_set = replica_set
 
 async def init_async_db():
     async with async_engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
-async def get_async_db():
-    async with AsyncSession(async_engine) as session:
-        yield session
+def set_read_only(session: AsyncSession, read_only: bool):
+    session.info[READ_ONLY] = read_only
+    session.sync_session.autoflush = not read_only
+
+
+async def release_connection(session: AsyncSession):
+    """
+    End the current transaction so its connection goes back to the pool, as long as the session
+    has not written anything. Loaded objects stay usable, request sessions do not expire them
+    on commit.
+    """
+    if not session.in_transaction() or session.new or session.dirty or session.deleted:
+        return
+    if session.info.get(READ_ONLY) or not session.info.get(STICKY_PRIMARY):
+        await session.commit()
+
+
+@asynccontextmanager
+async def read_and_release(session: AsyncSession, replica: bool = True):
+    """
+    Run the reads of the block (on a replica when allowed and `replica` is set), then release the
+    connection. Results must be materialized (`.all()`, `.first()`) inside the block, so the handler
+    returns plain objects and the connection is back in the pool before the response is serialized.
+    """
+    with read_replica(session) if replica else nullcontext():
+        yield
+    await release_connection(session)
 
 
 def get_redis():
-    client = Redis(
+    client = InstrumentedRedis(
         host=settings.REDIS_HOST,
         port=settings.REDIS_PORT,
         db=0
@@ -72,7 +123,7 @@ def get_sync_session():
 
 @asynccontextmanager
 async def get_async_session():
-    async with AsyncSession(async_engine) as session:
+    async with AsyncSession(async_engine, sync_session_class=RoutingSession, expire_on_commit=False) as session:
         try:
             yield session
         except Exception:
@@ -0,0 +1,39 @@
+# pyright: reportAssignmentType=false
+from datetime import datetime
+
+from sqlmodel import Field, Index, SQLModel
+
+
+class Broadcast(SQLModel, table=True):
+    """
+    A notification sent to every user of a role, stored once instead of once per recipient.
+    Users only see the broadcasts of their role created after they joined.
+    """
+
+    __tablename__ = 'broadcasts'
+    __table_args__ = (
+        Index('ix_broadcasts_role_created_at', 'role', 'created_at'),
+    )
+
+    id: int = Field(default=None, primary_key=True)
+    role: str
+    triggered_by: int
+
+    title: str
+    body: str
+    category: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now())
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(),
+        sa_column_kwargs={'onupdate': lambda: datetime.now()}
+    )
+
+
+class BroadcastReceipt(SQLModel, table=True):
+    """Marks a broadcast as seen by a user, only users who saw a broadcast have a row."""
+
+    __tablename__ = 'broadcast_receipts'
+
+    broadcast_id: int = Field(foreign_key='broadcasts.id', primary_key=True, ondelete='CASCADE')
+    user_id: int = Field(primary_key=True, index=True)
+    seen_at: datetime = Field(default_factory=lambda: datetime.now())
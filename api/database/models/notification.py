@@ -2,27 +2,39 @@
 # pyright: reportUndefinedVariable=false
 from datetime import datetime
 
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Index, Relationship, SQLModel
 
 
 class Notification(SQLModel, table=True):
+    """
+    On MySQL the table is range partitioned by `created_at` month (see the partitioning migration),
+    so it has no foreign keys and its primary key is `(id, created_at)`; the ORM still identifies
+    rows by `id` alone. Filter on `created_at` where possible so queries only touch the partitions
+    they need.
+    """
+
     __tablename__ = 'notifications'
+    __table_args__ = (
+        Index('ix_notifications_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_notifications_user_id_seen_id', 'user_id', 'seen', 'id'),
+        Index('ix_notifications_triggered_by', 'triggered_by'),
+    )
 
     id: int = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key='users.id')
+    user_id: int
     triggered_by: int = Field(...)
     
     title: str
     body: str
     category: str
     seen: bool = Field(default=False)
-    created_at: datetime = Field(default_factory=lambda: datetime.now())
+    created_at: datetime = Field(default_factory=lambda: datetime.now(), index=True)
     updated_at: datetime = Field(
         default_factory=lambda: datetime.now(),
         sa_column_kwargs={'onupdate': lambda: datetime.now()}
     )
 
     user: 'User' = Relationship( # noqa: F821
-        sa_relationship_kwargs={"primaryjoin": "User.id == Notification.user_id"},
+        sa_relationship_kwargs={"primaryjoin": "User.id == foreign(Notification.user_id)"},
         back_populates='notifications'
     )
@@ -0,0 +1,26 @@
+# pyright: reportAssignmentType=false
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlmodel import Field, SQLModel
+
+
+class NotificationArchive(SQLModel, table=True):
+    """Seen notifications moved out of `notifications` by the retention job, ids are kept."""
+
+    __tablename__ = 'notifications_archive'
+
+    id: int = Field(primary_key=True)
+    user_id: int = Field(index=True)
+    triggered_by: int
+
+    title: str
+    body: str
+    category: str
+    seen: bool = Field(default=True)
+    created_at: datetime
+    updated_at: datetime
+    archived_at: datetime = Field(
+        default_factory=lambda: datetime.now(),
+        sa_column_kwargs={'server_default': text('CURRENT_TIMESTAMP')} # filled in by INSERT ... SELECT
+    )
@@ -20,6 +20,7 @@ class User(SQLModel, table=True):
     api: str | None = Field(nullable=True, default=None)
     tfa_secret: str | None = Field(nullable=True, default=None)
     tfa_methods: list[str] | None = Field(sa_column=Column(JSON), default_factory=list)
+    deleted_at: datetime | None = Field(nullable=True, default=None, index=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now())
     updated_at: datetime = Field(
         default_factory=lambda: datetime.now(),
@@ -28,5 +29,9 @@ class User(SQLModel, table=True):
 
     notifications: list['Notification'] = Relationship( # noqa: F821
         back_populates='user',
-        sa_relationship_kwargs={'cascade':'all, delete-orphan'}
+        sa_relationship_kwargs={
+            'primaryjoin': 'User.id == foreign(Notification.user_id)',
+            # Notifications are removed by the `purge_deleted_users` task, never through the session
+            'passive_deletes': 'all',
+        }
     )
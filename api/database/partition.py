@@ -0,0 +1,72 @@
+from datetime import date, datetime
+
+from sqlalchemy import Connection, text
+
+
+CATCH_ALL = 'pmax'
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'p{month:%Y%m}'
+
+
+def partition_clause(month: date) -> str:
+    """Partition holding the rows created during `month`."""
+    upper = add_months(month, 1)
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))"
+
+
+def monthly_partitions(first: date, last: date) -> list[str]:
+    """Clauses for every month from `first` to `last` (inclusive) followed by the catch-all partition."""
+    clauses = []
+    month = month_start(first)
+    while month <= last:
+        clauses.append(partition_clause(month))
+        month = add_months(month, 1)
+    clauses.append(f'PARTITION {CATCH_ALL} VALUES LESS THAN MAXVALUE')
+    return clauses
+
+
+def existing_partitions(conn: Connection, table: str) -> list[str]:
+    result = conn.execute(
+        text(
+            'SELECT PARTITION_NAME FROM information_schema.PARTITIONS '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL '
+            'ORDER BY PARTITION_ORDINAL_POSITION'
+        ),
+        {'table': table},
+    )
+    return [row[0] for row in result]
+
+
+def ensure_monthly_partitions(conn: Connection, table: str, until: date) -> list[str]:
+    """
+    Split the catch-all partition of `table` so every month up to `until` has its own partition.
+    Done ahead of time while the catch-all is still empty, this only touches metadata.
+    Returns the names of the partitions created; nothing is done when `table` is not partitioned.
+    """
+    partitions = existing_partitions(conn, table)
+    if CATCH_ALL not in partitions:
+        return []
+
+    monthly = sorted(name for name in partitions if name != CATCH_ALL)
+    if monthly:
+        last = datetime.strptime(monthly[-1], 'p%Y%m').date()
+        first = add_months(last, 1)
+    else:
+        first = month_start(date.today())
+    if first > month_start(until):
+        return []
+
+    clauses = monthly_partitions(first, month_start(until))
+    conn.execute(text(f'ALTER TABLE {table} REORGANIZE PARTITION {CATCH_ALL} INTO ({", ".join(clauses)})'))
+    return [clause.split()[1] for clause in clauses[:-1]]
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+
+from loguru import logger
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from api.metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_CONNECTION_HOLD
+
+
+# Describes who is checking out connections (e.g. `GET /users trace=...`), set by the request middleware
+pool_holder: ContextVar[str | None] = ContextVar('pool_holder', default=None)
+
+MAX_LOGGED_HOLDERS = 10
+
+
+def describe_holder() -> str:
+    if holder := pool_holder.get():
+        return holder
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return f'task {task.get_name()}'
+    return f'thread {threading.current_thread().name}'
+
+
+class TimedQueuePoolMixin:
+    """
+    Record how long each checkout waited for a connection, including overflow creation, and how
+    long it was held until returned; remember who holds every checked out connection.
+
+    When a checkout waits longer than `slow_checkout_ms` a warning is logged with the pool
+    status and the longest running holders, which is usually enough to find the request or
+    job starving the pool.
+    """
+
+    metrics_name = ''
+    slow_checkout_ms = 0.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.holders: dict[int, tuple[str, float]] = {}
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()  # type: ignore
+        except exc.TimeoutError:
+            now = time.perf_counter()
+            DB_POOL_CHECKOUT_WAIT.observe(now - start, engine=self.metrics_name)
+            self.log_slow_checkout(now - start, now)
+            raise
+        now = time.perf_counter()
+        waited = now - start
+        self.holders[id(record)] = (describe_holder(), now)
+
+        DB_POOL_CHECKOUT_WAIT.observe(waited, engine=self.metrics_name)
+        if self.slow_checkout_ms and waited * 1000 >= self.slow_checkout_ms:
+            self.log_slow_checkout(waited, now)
+        return record
+
+    def _do_return_conn(self, record):
+        if (holder := self.holders.pop(id(record), None)) is not None:
+            DB_POOL_CONNECTION_HOLD.observe(time.perf_counter() - holder[1], engine=self.metrics_name)
+        super()._do_return_conn(record)  # type: ignore
+
+    def log_slow_checkout(self, waited: float, now: float):
+        holders = sorted(self.holders.copy().values(), key=lambda item: item[1])[:MAX_LOGGED_HOLDERS]
+        described = ', '.join(f'{holder} ({(now - since) * 1000:.0f}ms)' for holder, since in holders)
+        logger.warning(
+            f'Pool `{self.metrics_name}` checkout waited {waited * 1000:.0f}ms '
+            f'({self.status()}), longest holders: {described or "none"}'  # type: ignore
+        )
+
+    def recreate(self):
+        pool = super().recreate()  # type: ignore
+        pool.metrics_name = self.metrics_name
+        pool.slow_checkout_ms = self.slow_checkout_ms
+        return pool
+
+
+class TimedQueuePool(TimedQueuePoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(TimedQueuePoolMixin, AsyncAdaptedQueuePool):
+    pass
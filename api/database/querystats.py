@@ -0,0 +1,86 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+WHITESPACE_RE = re.compile(r'\s+')
+IN_LIST_RE = re.compile(r'IN \((?:\s*(?:%s|\?|:\w+|%\(\w+\)s)\s*,?)+\)', re.IGNORECASE)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    connection_ms: float = 0.0  # time connections were checked out of the pool for the request
+    shapes: Counter[str] = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.shapes[normalize_statement(statement)] += 1
+
+    @property
+    def repeated(self) -> int:
+        """Number of executions that repeated a statement shape already seen in this request."""
+        return self.count - len(self.shapes)
+
+    def suspected_n_plus_one(self, threshold: int) -> dict[str, int]:
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar('current_query_stats', default=None)
+
+
+def normalize_statement(statement: str) -> str:
+    statement = WHITESPACE_RE.sub(' ', statement).strip()
+    return IN_LIST_RE.sub('IN (...)', statement)
+
+
+def start_query_stats() -> tuple[QueryStats, Token]:
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    return stats, token
+
+
+def stop_query_stats(token: Token):
+    current_query_stats.reset(token)
+
+
+def instrument_engine(engine: Engine):
+    # Start times live on the execution context, a failed statement can not leave one behind
+    # on the pooled connection for the next statement to pick up
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and current_query_stats.get() is not None:
+            context._query_start_time = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        start = getattr(context, '_query_start_time', None)
+        if stats is None or start is None:
+            return
+        context._query_start_time = None
+        stats.record(statement, (time.perf_counter() - start) * 1000)
+
+    @event.listens_for(engine, 'handle_error')
+    def on_error(exception_context):
+        if (context := exception_context.execution_context) is not None:
+            context._query_start_time = None
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        if current_query_stats.get() is not None:
+            connection_record.info['request_checkout_time'] = time.perf_counter()
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        start = connection_record.info.pop('request_checkout_time', None)
+        stats = current_query_stats.get()
+        if stats is not None and start is not None:
+            stats.connection_ms += (time.perf_counter() - start) * 1000
@@ -0,0 +1,135 @@
+import asyncio
+import itertools
+from contextlib import contextmanager
+
+from loguru import logger
+from sqlalchemy import Select, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Session
+
+
+# Session.info keys
+REPLICA_ALLOWED = 'replica_allowed'  # set per request, only safe (read only) requests may use replicas
+USE_REPLICA = 'use_replica'  # set by the read helpers in `queryutil`
+STICKY_PRIMARY = 'sticky_primary'  # set once the session wrote, so it keeps reading its own writes
+READ_ONLY = 'read_only'  # set by `get_async_read_db`, transactions are started read only
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.lag: float | None = None
+
+
+class ReplicaSet:
+    """
+    Round-robin over the replicas whose replication lag is known to be within `max_lag`.
+
+    Lag is polled every `check_interval` seconds with `SHOW REPLICA STATUS` by a task started
+    on the first request; a replica that is unreachable, stopped or too far behind is skipped
+    until the next check marks it healthy again. With no healthy replica `choose` returns None
+    and the caller falls back to the primary.
+    """
+
+    def __init__(self, replicas: list[Replica], max_lag: float, check_interval: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.counter = itertools.count()
+        self.monitor_task: asyncio.Task | None = None
+
+    def choose(self) -> Replica | None:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self.counter) % len(healthy)]
+
+    async def check(self, replica: Replica):
+        try:
+            async with replica.engine.connect() as conn:
+                result = await conn.execute(text('SHOW REPLICA STATUS'))
+                row = result.mappings().first()
+            # Not configured as a replica (e.g. a plain read pool), nothing to lag behind
+            lag = row['Seconds_Behind_Source'] if row is not None else 0
+        except Exception as ex:
+            logger.warning(f'Replica `{replica.name}` lag check failed: {ex}')
+            lag = None
+
+        healthy = lag is not None and lag <= self.max_lag
+        if healthy != replica.healthy:
+            logger.warning(f'Replica `{replica.name}` is now {"healthy" if healthy else "unhealthy"} (lag={lag})')
+        replica.lag = lag
+        replica.healthy = healthy
+
+    async def monitor(self):
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(self.check_interval)
+
+    def ensure_monitor(self):
+        if not self.replicas:
+            return
+        if self.monitor_task is None or self.monitor_task.done():
+            self.monitor_task = asyncio.get_running_loop().create_task(self.monitor())
+
+
+class RoutingSession(Session):
+    """
+    Sends plain SELECTs issued inside `read_replica` to a replica when the session allows it,
+    everything else (writes, locking reads, flushes) goes to the primary bind.
+
+    After the first write the session sticks to the primary so it always reads its own writes.
+    """
+
+    replica_set: ReplicaSet | None = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.replica_set is not None
+            and self.info.get(USE_REPLICA)
+            and self.info.get(REPLICA_ALLOWED)
+            and not self.info.get(STICKY_PRIMARY)
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        ):
+            if replica := self.replica_set.choose():
+                return replica.engine.sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def stick_after_flush(session, flush_context):
+    session.info[STICKY_PRIMARY] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def stick_after_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[STICKY_PRIMARY] = True
+
+
+@event.listens_for(RoutingSession, 'after_begin')
+def begin_read_only(session, transaction, connection):
+    if not session.info.get(READ_ONLY) or connection.dialect.name != 'mysql':
+        return
+    # MySQL starts the transaction with the next statement, SET TRANSACTION applies to it.
+    # Sent on the driver cursor, it is transaction setup rather than a query of the request.
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute('SET TRANSACTION READ ONLY')
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def read_replica(db):
+    """Route the reads issued inside this block to a replica, when the session allows it."""
+    previous = db.info.get(USE_REPLICA, False)
+    db.info[USE_REPLICA] = True
+    try:
+        yield
+    finally:
+        db.info[USE_REPLICA] = previous
@@ -0,0 +1,59 @@
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+QUERY_COUNT_KEY = 'query_count'
+IDENTITY_KEYS_KEY = 'identity_keys'
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def count_orm_execute(orm_execute_state: ORMExecuteState):
+    info = orm_execute_state.session.info
+    info[QUERY_COUNT_KEY] = info.get(QUERY_COUNT_KEY, 0) + 1
+
+
+def get_query_count(db: AsyncSession | Session) -> int:
+    return db.info.get(QUERY_COUNT_KEY, 0)
+
+
+async def get_by[T: SQLModel](
+    db: AsyncSession,
+    model_cls: type[T],
+    field: str,
+    value: Any,
+) -> T | None:
+    """
+    Load a row by a unique field, reusing the instance already held by the session.
+
+    The first lookup records which primary key the (model, field, value) triple resolved to,
+    later lookups in the same session go through `AsyncSession.get` which is served from the
+    identity map without emitting SQL.
+
+    Args:
+        db (AsyncSession): Request scoped session.
+        model_cls (type[T]): Model to load.
+        field (str): Unique field to match against.
+        value (Any): Value of the unique field.
+
+    Returns:
+        T: The matching instance.
+        None: If no row matches.
+    """
+    identity_keys: dict = db.info.setdefault(IDENTITY_KEYS_KEY, {})
+    key = (model_cls, field, value)
+
+    if (pk := identity_keys.get(key)) is not None:
+        obj = await db.get(model_cls, pk)
+        if obj is not None and getattr(obj, field) == value:
+            return obj
+        identity_keys.pop(key, None)
+
+    result = await db.exec(select(model_cls).where(getattr(model_cls, field) == value))
+    obj = result.first()
+    if obj is not None:
+        identity_keys[key] = obj.id # type: ignore
+    return obj
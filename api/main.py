@@ -2,19 +2,24 @@ from pathlib import Path
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from fastapi.openapi.docs import get_redoc_html, get_swagger_oauth2_redirect_html, get_swagger_ui_html
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 
+from api.middlewares.compression import CompressionMiddleware
+from api.middlewares.metrics import MetricsMiddleware
 from api.middlewares.tracing import TracingMiddleware, setup_tracing
+from api.openapi import OpenAPICache
 from api.routes.application_setting import router as app_setting_router
 from api.routes.auth import router as auth_router
+from api.routes.metrics import router as metrics_router
 from api.routes.notification import router as notification_router
 from api.routes.permission import router as permission_router
 from api.routes.role_access_control import router as role_access_control_router
 from api.routes.template import router as template_router
 from api.routes.user import router as user_router
+from api.routes.utils.fileutil import INCOMING_DIR
+from api.routes.utils.staticutil import CachedStaticFiles
 from api.settings import settings
 
 
@@ -22,18 +27,28 @@ BASE_PATH = Path(__file__).parent
 STATIC_DIR = BASE_PATH / 'static'
 ROOT_API_PATH = '/api'
 FAVICON_URL = f'{ROOT_API_PATH}/static/brand.png'
+OPENAPI_URL = '/openapi.json'
 
 app = FastAPI(
     title=settings.APP_NAME.title(),
     description=f'API documentation for {settings.APP_NAME.title()}',
     docs_url=f'{ROOT_API_PATH}/docs',
     redoc_url=f'{ROOT_API_PATH}/redoc',
-    openapi_url='/openapi.json',
+    openapi_url=None, # served from the cached artifact below
     root_path=ROOT_API_PATH,
     version='1.0.0',
 )
 setup_tracing(app)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        min_size=settings.COMPRESSION_MIN_SIZE,
+        content_types=tuple(settings.COMPRESSION_TYPES),
+        levels=settings.COMPRESSION_LEVELS,
+        cache_paths=tuple(settings.COMPRESSION_CACHE_PATHS),
+    )
 app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
 
 app.include_router(auth_router)
@@ -43,8 +58,13 @@ app.include_router(app_setting_router)
 app.include_router(role_access_control_router)
 app.include_router(permission_router)
 app.include_router(template_router)
+app.include_router(metrics_router)
 
-app.mount('/static', StaticFiles(directory=STATIC_DIR), name='static')
+app.mount(
+    '/static',
+    CachedStaticFiles(directory=STATIC_DIR, hidden=(INCOMING_DIR.relative_to(STATIC_DIR).as_posix(),)),
+    name='static',
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -70,10 +90,18 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+openapi_cache = OpenAPICache(app)
+
+
+@app.get(OPENAPI_URL, include_in_schema=False)
+async def openapi_json(request: Request):
+    return await openapi_cache.response(request)
+
+
 @app.get('/docs', include_in_schema=False)
 async def swagger_ui_docs(request: Request):
     root_path = request.scope.get('root_path', '').rstrip('/')
-    openapi_url = root_path + app.openapi_url
+    openapi_url = root_path + OPENAPI_URL
     oauth2_redirect_url = app.swagger_ui_oauth2_redirect_url
     if oauth2_redirect_url:
         oauth2_redirect_url = root_path + oauth2_redirect_url
@@ -88,10 +116,15 @@ async def swagger_ui_docs(request: Request):
     )
 
 
+@app.get(app.swagger_ui_oauth2_redirect_url, include_in_schema=False) # type: ignore
+async def swagger_ui_redirect():
+    return get_swagger_oauth2_redirect_html()
+
+
 @app.get('/redoc', include_in_schema=False)
 async def redoc_docs(request: Request):
     root_path = request.scope.get('root_path', '').rstrip('/')
-    openapi_url = root_path + app.openapi_url
+    openapi_url = root_path + OPENAPI_URL
 
     return get_redoc_html(
         openapi_url=openapi_url, title=f'{app.title} - ReDoc',
@@ -0,0 +1,293 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from api.settings import settings
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SHARED_KEY_PREFIX = 'metrics:'
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_labels(pairs: Iterable[tuple[str, object]]) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{escape_label(v)}"' for k, v in pairs) + '}'
+
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.lock = threading.Lock()
+
+    def label_key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        lines.extend(self.samples())
+        return lines
+
+    def samples(self) -> Iterable[str]:
+        return []
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self.label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self.lock:
+            values = list(self.values.items())
+        for key, value in values:
+            yield f'{self.name}{format_labels(zip(self.labelnames, key, strict=True))} {format_value(value)}'
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[self.label_key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class CallbackGauge(Metric):
+    """Gauge evaluated at scrape time from `callback`, which yields `(labels, value)` pairs."""
+
+    type = 'gauge'
+
+    def __init__(self, name: str, help: str, callback: Callable[[], Iterable[tuple[dict, float]]]):
+        super().__init__(name, help)
+        self.callback = callback
+
+    def samples(self):
+        for labels, value in self.callback():
+            yield f'{self.name}{format_labels(labels.items())} {format_value(value)}'
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # label key -> [per bucket counts, sum, count]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self.label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def collect(self) -> list[tuple[tuple, list[int], float, int]]:
+        with self.lock:
+            return [(key, list(counts), total, count) for key, (counts, total, count) in self.values.items()]
+
+    def samples(self):
+        for key, counts, total, count in self.collect():
+            labels = list(zip(self.labelnames, key, strict=True))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts, strict=True):
+                cumulative += bucket_count
+                bucket_labels = format_labels(labels + [('le', format_value(bound))])
+                yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+            yield f'{self.name}_sum{format_labels(labels)} {format_value(total)}'
+            yield f'{self.name}_count{format_labels(labels)} {count}'
+
+
+class SharedHistogram(Histogram):
+    """
+    Histogram stored in a Redis hash instead of process memory, so observations made by
+    every process (API pods and RQ work horses) end up in one series scraped from any pod.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.key = f'{SHARED_KEY_PREFIX}{self.name}'
+
+    def observe(self, value: float, **labels):
+        key = '|'.join(self.label_key(labels))
+        index = bisect_left(self.buckets, value)
+        pipe = get_metrics_redis().pipeline(transaction=False)
+        pipe.hincrby(self.key, f'{key}|b{index}', 1)
+        pipe.hincrbyfloat(self.key, f'{key}|sum', value)
+        pipe.hincrby(self.key, f'{key}|count', 1)
+        pipe.execute()
+
+    def collect(self):
+        entries: dict[tuple, list] = {}
+        for field, value in get_metrics_redis().hgetall(self.key).items():
+            *key, slot = field.decode().split('|')
+            entry = entries.setdefault(tuple(key), [[0] * len(self.buckets), 0.0, 0])
+            if slot == 'sum':
+                entry[1] = float(value)
+            elif slot == 'count':
+                entry[2] = int(value)
+            else:
+                entry[0][int(slot[1:])] = int(value)
+        return [(key, counts, total, count) for key, (counts, total, count) in entries.items()]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register[M: Metric](self, metric: M) -> M:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+_metrics_redis: Redis | None = None
+_metrics_redis_pid: int | None = None
+
+
+def get_metrics_redis() -> Redis:
+    # RQ forks a work horse per job, so a client is created per process
+    global _metrics_redis, _metrics_redis_pid
+    if _metrics_redis is None or _metrics_redis_pid != os.getpid():
+        _metrics_redis = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0)
+        _metrics_redis_pid = os.getpid()
+    return _metrics_redis
+
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'http_requests_total', 'HTTP requests handled', ('method', 'route', 'status'),
+))
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency until the response is sent', ('method', 'route'),
+))
+HTTP_REQUESTS_IN_PROGRESS = REGISTRY.register(Gauge(
+    'http_requests_in_progress', 'HTTP requests currently being handled',
+))
+DB_POOL_CHECKOUTS = REGISTRY.register(Counter(
+    'db_pool_checkouts_total', 'Connections checked out of the pool', ('engine',),
+))
+DB_POOL_CONNECTS = REGISTRY.register(Counter(
+    'db_pool_connects_total', 'New DBAPI connections opened by the pool', ('engine',),
+))
+DB_POOL_CHECKOUT_WAIT = REGISTRY.register(Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection', ('engine',),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0),
+))
+DB_POOL_CONNECTION_HOLD = REGISTRY.register(Histogram(
+    'db_pool_connection_hold_seconds', 'Time a connection stayed checked out of the pool', ('engine',),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+))
+DB_REQUEST_CONNECTION_HOLD = REGISTRY.register(Histogram(
+    'db_request_connection_hold_seconds', 'Time a request kept database connections checked out', ('method', 'route'),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+))
+DB_POOL_INVALIDATIONS = REGISTRY.register(Counter(
+    'db_pool_invalidations_total', 'Pooled connections invalidated', ('engine',),
+))
+REDIS_COMMAND_DURATION = REGISTRY.register(Histogram(
+    'redis_command_duration_seconds', 'Redis command latency', ('command',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+))
+
+instrumented_engines: dict[str, Engine] = {}
+
+
+def pool_samples(attr: str):
+    def callback():
+        for name, engine in instrumented_engines.items():
+            method = getattr(engine.pool, attr, None)
+            if callable(method):
+                yield {'engine': name}, method()
+    return callback
+
+
+REGISTRY.register(CallbackGauge('db_pool_size', 'Configured pool size', pool_samples('size')))
+REGISTRY.register(CallbackGauge('db_pool_checked_out', 'Connections currently checked out', pool_samples('checkedout')))
+REGISTRY.register(CallbackGauge('db_pool_overflow', 'Connections opened beyond pool_size', pool_samples('overflow')))
+REGISTRY.register(CallbackGauge('db_pool_checked_in', 'Idle connections in the pool', pool_samples('checkedin')))
+
+
+def instrument_pool(engine: Engine, name: str):
+    instrumented_engines[name] = engine
+    engine.pool.metrics_name = name  # type: ignore
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc(engine=name)
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTS.inc(engine=name)
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        DB_POOL_INVALIDATIONS.inc(engine=name)
+
+
+class InstrumentedRedis(Redis):
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            command = str(args[0]).split(' ', 1)[0].upper() if args else ''
+            REDIS_COMMAND_DURATION.observe(time.perf_counter() - start, command=command)
+
+
+class InstrumentedAsyncRedis(AsyncRedis):
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            command = str(args[0]).split(' ', 1)[0].upper() if args else ''
+            REDIS_COMMAND_DURATION.observe(time.perf_counter() - start, command=command)
@@ -0,0 +1,238 @@
+import gzip
+import hashlib
+import zlib
+from collections import OrderedDict
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+try:
+    import brotli
+except ImportError:  # optional, br is not offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional, zstd is not offered without it
+    zstandard = None
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 writes the gzip header and trailer
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync flush so every streamed chunk reaches the client as soon as it is produced
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        self.compressor = brotli.Compressor(quality=level) # type: ignore
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj() # type: ignore
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) # type: ignore
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+def compress_body(encoding: str, body: bytes, level: int) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=level) # type: ignore
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(body) # type: ignore
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+COMPRESSORS = {'br': BrotliCompressor, 'zstd': ZstdCompressor, 'gzip': GzipCompressor}
+
+
+def available_encodings() -> list[str]:
+    """Encodings this process can produce, in order of preference."""
+    encodings = []
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    encodings.append('gzip')
+    return encodings
+
+
+def choose_encoding(accept_encoding: str, encodings: list[str]) -> str | None:
+    """Pick the preferred encoding among those the client accepts with a non-zero q-value."""
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        name, *params = item.strip().split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best encoding the client accepts (br and zstd when their packages
+    are installed, gzip otherwise).
+
+    Only responses whose content type starts with one of `content_types` are compressed, and
+    responses sent in one piece are left alone below `min_size` bytes. Streamed responses
+    (`StreamingResponse`, e.g. the exports) are compressed chunk by chunk and flushed after every
+    chunk. Responses already encoded, partial (206) or marked `no-transform` pass through.
+
+    Compressed bodies of `cache_paths` (e.g. `/openapi.json`) are kept in a small LRU keyed by a
+    digest of the uncompressed body, so an unchanged document is compressed once per process.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        min_size: int = 1024,
+        content_types: tuple[str, ...] = ('application/json', 'text/'),
+        levels: dict[str, int] | None = None,
+        cache_paths: tuple[str, ...] = (),
+        cache_entries: int = 32,
+    ):
+        self.app = app
+        self.min_size = min_size
+        self.content_types = content_types
+        self.levels = {'br': 4, 'zstd': 3, 'gzip': 6} | (levels or {})
+        self.encodings = available_encodings()
+        self.cache_paths = cache_paths
+        self.cache_entries = cache_entries
+        self.cache: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding', ''), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope['path'].removeprefix(scope.get('root_path', '')) or '/'
+        responder = CompressionResponder(self, send, encoding, cacheable=path in self.cache_paths)
+        await self.app(scope, receive, responder.send)
+
+    def cached_compress(self, encoding: str, body: bytes) -> bytes:
+        key = (encoding, hashlib.sha1(body).hexdigest())
+        if (compressed := self.cache.get(key)) is not None:
+            self.cache.move_to_end(key)
+            return compressed
+        compressed = compress_body(encoding, body, self.levels[encoding])
+        self.cache[key] = compressed
+        while len(self.cache) > self.cache_entries:
+            self.cache.popitem(last=False)
+        return compressed
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: str, cacheable: bool):
+        self.middleware = middleware
+        self.downstream = send
+        self.encoding = encoding
+        self.cacheable = cacheable
+        self.start_message: Message | None = None
+        self.compressor = None
+        self.passthrough = False
+
+    def should_compress(self, headers: Headers) -> bool:
+        if self.start_message['status'] in (204, 206, 304): # type: ignore
+            return False
+        if 'content-encoding' in headers or 'no-transform' in headers.get('cache-control', ''):
+            return False
+        content_type = headers.get('content-type', '')
+        if not content_type.startswith(self.middleware.content_types):
+            return False
+        content_length = headers.get('content-length')
+        return content_length is None or int(content_length) >= self.middleware.min_size
+
+    def compressed_headers(self, content_length: int | None) -> list:
+        headers = MutableHeaders(raw=list(self.start_message['headers'])) # type: ignore
+        headers['content-encoding'] = self.encoding
+        headers.add_vary_header('Accept-Encoding')
+        if 'content-length' in headers:
+            del headers['content-length']
+        if content_length is not None:
+            headers['content-length'] = str(content_length)
+        # The compressed body is not byte-identical to the original any more
+        if (etag := headers.get('etag')) and not etag.startswith('W/'):
+            headers['etag'] = f'W/{etag}'
+        return headers.raw
+
+    async def send(self, message: Message):
+        if message['type'] == 'http.response.start':
+            self.start_message = message
+            self.passthrough = not self.should_compress(Headers(raw=message['headers']))
+            if self.passthrough:
+                await self.downstream(message)
+            return
+
+        if self.passthrough:
+            await self.downstream(message)
+            return
+
+        if message['type'] != 'http.response.body':
+            # e.g. `http.response.pathsend`, the file is sent as is by the server
+            if self.compressor is None:
+                self.passthrough = True
+                await self.downstream(self.start_message) # type: ignore
+            await self.downstream(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.compressor is None and not more_body:
+            # Whole response in one message
+            if len(body) < self.middleware.min_size:
+                await self.downstream(self.start_message) # type: ignore
+                await self.downstream(message)
+                return
+            if self.cacheable:
+                compressed = self.middleware.cached_compress(self.encoding, body)
+            else:
+                compressed = compress_body(self.encoding, body, self.middleware.levels[self.encoding])
+            await self.downstream({**self.start_message, 'headers': self.compressed_headers(len(compressed))}) # type: ignore
+            await self.downstream({'type': 'http.response.body', 'body': compressed})
+            return
+
+        if self.compressor is None:
+            self.compressor = COMPRESSORS[self.encoding](self.middleware.levels[self.encoding])
+            await self.downstream({**self.start_message, 'headers': self.compressed_headers(None)}) # type: ignore
+
+        data = self.compressor.compress(body) if body else b''
+        if not more_body:
+            data += self.compressor.finish()
+        if data or not more_body:
+            await self.downstream({'type': 'http.response.body', 'body': data, 'more_body': more_body})
@@ -0,0 +1,123 @@
+import json
+import queue
+import random
+import threading
+import traceback
+from typing import TextIO
+
+
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+WRITE_BATCH_SIZE = 256
+
+
+class QueuedSink:
+    """
+    Loguru sink that hands messages to a background writer thread through a bounded queue,
+    so a slow stdout never blocks the event loop.
+
+    When the queue is full the newest (or oldest, with `drop_oldest`) message is dropped and
+    counted; the writer reports the number of dropped messages once the queue drains.
+    With `serialize=True` records are rendered as JSON lines on the writer thread.
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        max_size: int = 10000,
+        drop_policy: str = DROP_NEWEST,
+        serialize: bool = False,
+    ):
+        if drop_policy not in {DROP_NEWEST, DROP_OLDEST}:
+            raise ValueError(f'drop_policy must be `{DROP_NEWEST}` or `{DROP_OLDEST}`')
+
+        self.stream = stream
+        self.drop_policy = drop_policy
+        self.serialize = serialize
+        self.queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self.dropped = 0
+        self.reported_dropped = 0
+        self.thread = threading.Thread(target=self.run, name='log-writer', daemon=True)
+        self.thread.start()
+
+    def write(self, message):
+        try:
+            self.queue.put_nowait(message)
+            return
+        except queue.Full:
+            pass
+
+        if self.drop_policy == DROP_OLDEST:
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(message)
+            except (queue.Empty, queue.Full):
+                pass
+        self.dropped += 1
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            lines = [self.render(message) for message in batch if message is not None]
+            if self.dropped != self.reported_dropped:
+                lines.append(f'log queue full, dropped {self.dropped - self.reported_dropped} messages\n')
+                self.reported_dropped = self.dropped
+
+            try:
+                self.stream.write(''.join(lines))
+                self.stream.flush()
+            except Exception:
+                pass
+
+            if stop:
+                return
+
+    def render(self, message) -> str:
+        if not self.serialize:
+            return message
+        return serialize_record(message.record) + '\n'
+
+    def stop(self):
+        self.queue.put(None)
+        self.thread.join(timeout=5)
+
+
+def serialize_record(record: dict) -> str:
+    extra = record['extra']
+    data = {
+        'time': record['time'].isoformat(),
+        'level': record['level'].name,
+        'message': record['message'],
+        'logger': record['name'],
+        'function': record['function'],
+        'line': record['line'],
+        'trace_id': extra.get('otelTraceID'),
+        'span_id': extra.get('otelSpanID'),
+        'service': extra.get('otelServiceName'),
+    }
+    data.update({k: v for k, v in extra.items() if not k.startswith('otel')})
+    if exception := record['exception']:
+        data['exception'] = ''.join(
+            traceback.format_exception(exception.type, exception.value, exception.traceback)
+        )
+    return json.dumps(data, default=str)
+
+
+def make_sampling_filter(rates: dict[str, float]):
+    """Keep a record with the probability configured for its level, WARNING and above are always kept."""
+    rates = {level.upper(): rate for level, rate in rates.items()}
+
+    def sampling_filter(record) -> bool:
+        if record['level'].no >= 30:
+            return True
+        rate = rates.get(record['level'].name, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+    return sampling_filter
@@ -0,0 +1,46 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.metrics import DB_REQUEST_CONNECTION_HOLD, HTTP_REQUEST_DURATION, HTTP_REQUESTS, HTTP_REQUESTS_IN_PROGRESS
+
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Count requests and observe their latency per route template (e.g. `/users/{id}`)
+    rather than per raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            route = scope.get('route')
+            route_path = getattr(route, 'path', UNMATCHED_ROUTE)
+            method = scope['method']
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=status_code)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=route_path)
+            # Collected by the tracing middleware
+            if (stats := scope.get('state', {}).get('query_stats')) and stats.connection_ms:
+                DB_REQUEST_CONNECTION_HOLD.observe(stats.connection_ms / 1000, method=method, route=route_path)
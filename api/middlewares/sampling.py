@@ -0,0 +1,120 @@
+import re
+import threading
+from collections import OrderedDict
+
+from opentelemetry.context import Context
+from opentelemetry.instrumentation.utils import suppress_instrumentation
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.sdk.trace.sampling import ParentBased, Sampler, TraceIdRatioBased
+from opentelemetry.trace import StatusCode
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+TRACE_ID_LIMIT = (1 << 64) - 1
+
+
+def build_sampler(ratio: float, parent_based: bool) -> Sampler:
+    sampler = TraceIdRatioBased(ratio)
+    if parent_based:
+        return ParentBased(root=sampler)
+    return sampler
+
+
+class TailRetentionSpanProcessor(SpanProcessor):
+    """
+    Buffer the spans of each trace until its local root span ends, then forward the whole
+    trace to `next_processor` only when it is worth keeping: it contains an error, the root
+    took at least `slow_ms`, or the trace id falls into `baseline_ratio`.
+
+    At most `max_traces` traces are buffered, the oldest ones are dropped when full.
+    """
+
+    def __init__(
+        self,
+        next_processor: SpanProcessor,
+        slow_ms: float,
+        keep_errors: bool = True,
+        baseline_ratio: float = 0.0,
+        max_traces: int = 2048,
+    ):
+        self.next_processor = next_processor
+        self.slow_ms = slow_ms
+        self.keep_errors = keep_errors
+        self.baseline_bound = round(baseline_ratio * (TRACE_ID_LIMIT + 1))
+        self.max_traces = max_traces
+        self.traces: OrderedDict[int, list[ReadableSpan]] = OrderedDict()
+        self.errored: set[int] = set()
+        self.lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Context | None = None):
+        self.next_processor.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan):
+        trace_id = span.context.trace_id # type: ignore
+        is_local_root = span.parent is None or span.parent.is_remote
+
+        with self.lock:
+            spans = self.traces.setdefault(trace_id, [])
+            spans.append(span)
+            if span.status.status_code == StatusCode.ERROR:
+                self.errored.add(trace_id)
+
+            if not is_local_root:
+                while len(self.traces) > self.max_traces:
+                    dropped, _ = self.traces.popitem(last=False)
+                    self.errored.discard(dropped)
+                return
+
+            del self.traces[trace_id]
+            errored = trace_id in self.errored
+            self.errored.discard(trace_id)
+
+        if self.should_keep(span, errored):
+            for buffered in spans:
+                self.next_processor.on_end(buffered)
+
+    def should_keep(self, root: ReadableSpan, errored: bool) -> bool:
+        if errored and self.keep_errors:
+            return True
+        if root.start_time is not None and root.end_time is not None:
+            if (root.end_time - root.start_time) / 1e6 >= self.slow_ms:
+                return True
+        return (root.context.trace_id & TRACE_ID_LIMIT) < self.baseline_bound # type: ignore
+
+    def shutdown(self):
+        self.next_processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.next_processor.force_flush(timeout_millis)
+
+
+def exclude_sql_statements(engine: Engine, patterns: list[str]):
+    """
+    Suppress SQLAlchemy instrumentation for statements matching any of `patterns`
+    so no span is created for them at all.
+    """
+    if not patterns:
+        return
+    regex = re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE)
+
+    # insert=True so this runs before the instrumentation listener starts the span
+    @event.listens_for(engine, 'before_cursor_execute', insert=True)
+    def suppress_matching(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and regex.search(statement):
+            suppressor = suppress_instrumentation()
+            suppressor.__enter__()
+            context._trace_suppressor = suppressor
+
+    def restore(context):
+        if suppressor := getattr(context, '_trace_suppressor', None):
+            context._trace_suppressor = None
+            suppressor.__exit__(None, None, None)
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def restore_after_execute(conn, cursor, statement, parameters, context, executemany):
+        restore(context)
+
+    @event.listens_for(engine, 'handle_error')
+    def restore_on_error(exception_context):
+        restore(exception_context.execution_context)
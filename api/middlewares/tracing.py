@@ -9,72 +9,171 @@ from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExport
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
 from opentelemetry.sdk.resources import SERVICE_NAME, Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter
 from opentelemetry.trace import Status, StatusCode
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from api.settings import settings
+from api.database.engine import async_engine, sync_engine
+from api.database.pool import pool_holder
+from api.database.querystats import QueryStats, start_query_stats, stop_query_stats
+from api.middlewares.logsink import QueuedSink, make_sampling_filter
+from api.middlewares.sampling import TailRetentionSpanProcessor, build_sampler, exclude_sql_statements
+from api.settings import Settings, settings
 
 
 def instrument_loguru():
     def add_trace_context(record):
-        record['extra']['otelSpanID'] = '0'
-        record['extra']['otelTraceID'] = '0'
-        record['extra']['otelTraceSampled'] = False
-        record['extra']['otelServiceName'] = settings.APP_NAME
+        # Defaults come from `extra` below, only records logged inside a span need patching
+        ctx = trace.get_current_span().get_span_context()
+        if ctx.is_valid:
+            record['extra']['otelSpanID'] = format(ctx.span_id, '016x')
+            record['extra']['otelTraceID'] = format(ctx.trace_id, '032x')
+            record['extra']['otelTraceSampled'] = ctx.trace_flags.sampled
 
-        span = trace.get_current_span()
-        if span != trace.INVALID_SPAN:
-            ctx = span.get_span_context()
-            if ctx != trace.INVALID_SPAN_CONTEXT:
-                record['extra']['otelSpanID'] = format(ctx.span_id, '016x')
-                record['extra']['otelTraceID'] = format(ctx.trace_id, '032x')
-                record['extra']['otelTraceSampled'] = ctx.trace_flags.sampled
-
-    logger.configure(patcher=add_trace_context)
+    logger.configure(
+        patcher=add_trace_context,
+        extra={
+            'otelSpanID': '0',
+            'otelTraceID': '0',
+            'otelTraceSampled': False,
+            'otelServiceName': settings.APP_NAME,
+        },
+    )
 
 
 def setup_logging():
+    serialize = settings.LOG_FORMAT == 'json'
+    sink = QueuedSink(
+        sys.stdout,
+        max_size=settings.LOG_QUEUE_SIZE,
+        drop_policy=settings.LOG_DROP_POLICY,
+        serialize=serialize,
+    )
+
     logger.remove()
     logger.add(
-        sys.stdout,
-        format=(
+        sink,
+        # JSON lines are rendered by the sink's writer thread, so skip loguru formatting entirely
+        format=(lambda _: '{message}') if serialize else (
             "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> "
             "| <level>{level: <8}</level> "
             "| trace_id={extra[otelTraceID]} span_id={extra[otelSpanID]} "
             "| {name}:{function}:{line} - {message}"
         ),
-        level="INFO",
+        level=settings.LOG_LEVEL,
+        filter=make_sampling_filter(settings.LOG_SAMPLING),
+        colorize=not serialize and sys.stdout.isatty(),
+        catch=True,
     )
 
-def setup_tracing(app: FastAPI):
+def build_tracer_provider(exporter: SpanExporter, config: Settings = settings) -> TracerProvider:
     resource = Resource(attributes={
-        SERVICE_NAME: settings.APP_NAME,
+        SERVICE_NAME: config.APP_NAME,
     })
-    provider = TracerProvider(resource=resource)
-    trace.set_tracer_provider(provider)
+    provider = TracerProvider(
+        resource=resource,
+        sampler=build_sampler(config.TRACE_SAMPLE_RATIO, config.TRACE_PARENT_BASED),
+    )
 
-    exporter = OTLPSpanExporter()
-    span_processor = BatchSpanProcessor(exporter)
+    span_processor: SpanProcessor = BatchSpanProcessor(
+        exporter,
+        max_queue_size=config.TRACE_BATCH_MAX_QUEUE_SIZE,
+        max_export_batch_size=config.TRACE_BATCH_MAX_EXPORT_SIZE,
+        schedule_delay_millis=config.TRACE_BATCH_SCHEDULE_DELAY_MS,
+        export_timeout_millis=config.TRACE_BATCH_EXPORT_TIMEOUT_MS,
+    )
+    if config.TRACE_TAIL_ENABLED:
+        span_processor = TailRetentionSpanProcessor(
+            span_processor,
+            slow_ms=config.TRACE_TAIL_SLOW_MS,
+            keep_errors=config.TRACE_TAIL_KEEP_ERRORS,
+            baseline_ratio=config.TRACE_TAIL_BASELINE_RATIO,
+            max_traces=config.TRACE_TAIL_MAX_TRACES,
+        )
     provider.add_span_processor(span_processor)
+    return provider
+
+
+def setup_tracing(app: FastAPI):
+    provider = build_tracer_provider(OTLPSpanExporter())
+    trace.set_tracer_provider(provider)
+
+    engines = [sync_engine, async_engine.sync_engine]
+    for engine in engines:
+        exclude_sql_statements(engine, settings.TRACE_SQL_EXCLUDE)
 
     FastAPIInstrumentor.instrument_app(app)
-    SQLAlchemyInstrumentor().instrument()
+    # Engines are created on import, before this runs, so they have to be passed explicitly
+    SQLAlchemyInstrumentor().instrument(engines=engines)
     setup_logging()
     instrument_loguru()
 
 
-class TracingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+def record_query_stats(span: trace.Span, request: Request, stats: QueryStats, trace_id: str):
+    span.set_attribute('db.query_count', stats.count)
+    span.set_attribute('db.total_time_ms', stats.total_ms)
+    span.set_attribute('db.repeated_statements', stats.repeated)
+    span.set_attribute('db.connection_time_ms', stats.connection_ms)
+
+    for shape, count in stats.suspected_n_plus_one(settings.QUERY_REPEAT_THRESHOLD).items():
+        logger.warning(
+            f'Possible N+1 during {request.method} {request.url.path}: '
+            f'statement executed {count} times (trace_id={trace_id}): {shape}'
+        )
+
+    if settings.QUERY_BUDGET and stats.count > settings.QUERY_BUDGET:
+        span.set_attribute('db.query_budget_exceeded', True)
+        logger.warning(
+            f'{request.method} {request.url.path} executed {stats.count} statements, '
+            f'budget is {settings.QUERY_BUDGET} (trace_id={trace_id})'
+        )
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware adding trace and timing headers to every HTTP response.
+
+    Headers are injected by wrapping `send` on `http.response.start`, so the response body
+    (including `StreamingResponse` bodies) is passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.perf_counter()
         span = trace.get_current_span()
         trace_id = '0'
         if span and span.get_span_context().is_valid:
             trace_id = format(span.get_span_context().trace_id, '032x')
 
+        state = scope.setdefault('state', {})
+        state['trace_id'] = trace_id
+        stats, stats_token = start_query_stats()
+        state['query_stats'] = stats
+        holder_token = pool_holder.set(f"{scope['method']} {scope['path']} trace_id={trace_id}")
+
+        async def send_with_headers(message: Message):
+            if message['type'] == 'http.response.start':
+                elapsed_ms = (time.perf_counter() - start_time) * 1000
+                headers = MutableHeaders(scope=message)
+                headers['X-Trace-ID'] = trace_id
+                headers['X-Elapsed-Time'] = f'{elapsed_ms:.2f}ms'
+                headers['X-DB-Query-Count'] = str(stats.count)
+                headers['X-DB-Time'] = f'{stats.total_ms:.2f}ms'
+                headers['X-DB-Repeated-Statements'] = str(stats.repeated)
+                headers['X-DB-Connection-Time'] = f'{stats.connection_ms:.2f}ms'
+            await send(message)
+
+        request = Request(scope)
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_headers)
         except Exception as exc:
             if span:
                 span.record_exception(exc)
@@ -84,10 +183,7 @@ class TracingMiddleware(BaseHTTPMiddleware):
             logger.exception(f'Unhandled exception during {request.method} {request.url} (trace_id={trace_id})')
             raise
         finally:
-            elapsed_ms = (time.perf_counter() - start_time) * 1000
-            request.state.trace_id = trace_id
-            request.state.elapsed_ms = elapsed_ms
-
-        response.headers['X-Trace-ID'] = trace_id
-        response.headers['X-Elapsed-Time'] = f'{elapsed_ms:.2f}ms'
-        return response
+            state['elapsed_ms'] = (time.perf_counter() - start_time) * 1000
+            stop_query_stats(stats_token)
+            pool_holder.reset(holder_token)
+            record_query_stats(span, request, stats, trace_id)
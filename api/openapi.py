@@ -0,0 +1,119 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from functools import cache
+from importlib.metadata import version
+from pathlib import Path
+
+from fastapi import FastAPI, Request, Response, status
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
+
+from api.middlewares.compression import brotli, choose_encoding
+from api.routes.utils.cacheutil import etag_matches
+from api.settings import settings
+
+
+SOURCE_DIR = Path(__file__).parent
+ARTIFACT_DIR = SOURCE_DIR / '.openapi'
+
+
+@cache
+def source_digest() -> str:
+    """Hash of everything the schema is generated from: the api sources and the FastAPI/Pydantic versions."""
+    digest = hashlib.sha256(f'{version("fastapi")}:{version("pydantic")}'.encode())
+    for path in sorted(SOURCE_DIR.rglob('*.py')):
+        digest.update(str(path.relative_to(SOURCE_DIR)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def schema_version(app: FastAPI) -> str:
+    return f'{app.version}-{source_digest()}'
+
+
+def artifact_path(app: FastAPI) -> Path:
+    return ARTIFACT_DIR / f'openapi-{schema_version(app)}.json'
+
+
+def build_schema(app: FastAPI) -> bytes:
+    return json.dumps(app.openapi(), separators=(',', ':')).encode()
+
+
+def write_artifact(app: FastAPI, body: bytes | None = None) -> Path:
+    """Serialize the schema of `app` to its versioned artifact, atomically."""
+    body = body if body is not None else build_schema(app)
+    path = artifact_path(app)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.part')
+    with os.fdopen(fd, 'wb') as file:
+        file.write(body)
+    os.replace(tmp_path, path)
+    for stale in path.parent.glob('openapi-*.json'):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return path
+
+
+class OpenAPIDocument:
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:20]}"'
+        # in order of preference
+        self.variants: dict[str, bytes] = {}
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(body, quality=11)
+        self.variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+
+
+class OpenAPICache:
+    """
+    Serves the OpenAPI schema from a serialized artifact instead of rebuilding it per process.
+
+    The artifact is named after the app version and a hash of the api sources, so it is regenerated
+    whenever the code the schema comes from changes: either ahead of time with
+    `scripts/build_openapi.py`, or by the first request of the first process that finds it missing.
+    The body, its ETag and the gzip/brotli variants are computed once per process. With
+    `OPENAPI_ARTIFACT` off (development) the schema is rebuilt on every process start, as FastAPI does.
+    """
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self.document: OpenAPIDocument | None = None
+        self.lock = asyncio.Lock()
+
+    def load(self) -> OpenAPIDocument:
+        path = artifact_path(self.app)
+        if settings.OPENAPI_ARTIFACT and path.exists():
+            return OpenAPIDocument(path.read_bytes())
+
+        body = build_schema(self.app)
+        if settings.OPENAPI_ARTIFACT:
+            try:
+                write_artifact(self.app, body)
+            except OSError as ex:
+                logger.warning(f'Failed to write OpenAPI artifact {path}: {ex}')
+        return OpenAPIDocument(body)
+
+    async def get(self) -> OpenAPIDocument:
+        if self.document is None:
+            async with self.lock:
+                if self.document is None:
+                    self.document = await run_in_threadpool(self.load)
+        return self.document
+
+    async def response(self, request: Request) -> Response:
+        document = await self.get()
+        headers = {'ETag': document.etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+        if etag_matches(request.headers.get('if-none-match'), document.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        body = document.body
+        encoding = choose_encoding(request.headers.get('accept-encoding', ''), list(document.variants))
+        if encoding is not None:
+            body = document.variants[encoding]
+            headers['Content-Encoding'] = encoding
+        return Response(body, media_type='application/json', headers=headers)
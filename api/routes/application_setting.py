@@ -1,18 +1,25 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from loguru import logger
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from api.database import get_async_db
+from api.database.dependencies import get_async_read_db, get_async_write_db
 from api.database.models.application_setting import ApplicationSetting
 from api.database.models.user import User
 from api.routes.auth.core import get_authenticated_user
-from api.routes.utils import queryutil
+from api.routes.utils import cacheutil, exportutil, querycache, queryutil
+from api.routes.utils.cacheutil import ResponseCache, response_cache
 from api.routes.utils.crudutils import ActionResponse, make_crud_schemas
+from api.routes.utils.exportutil import ExportFormat
 from api.routes.utils.queryutil import GetListParams, get_list_params
+from api.routes.utils.singleflight import SingleFlight, request_key
 
 
 router = APIRouter(tags=['Application Setting'])
+querycache.register(ApplicationSetting)
+flights = SingleFlight()
 
 CreateSchema, UpdateSchema, ResponseSchema, ListResponseSchema = make_crud_schemas(
     ApplicationSetting,
@@ -26,7 +33,7 @@ ApplicationSettingUpdate = UpdateSchema
 @router.post('/application_settings', response_model=ResponseSchema)
 async def create_application_setting(
 	current_user: Annotated[User, get_authenticated_user('application_settings.create')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     data: ApplicationSettingCreate,
 ):
     try:
@@ -36,6 +43,7 @@ async def create_application_setting(
             modified_by_id=current_user.id
         )
         result = await queryutil.create_one(db, obj)
+        await cacheutil.bump_version(ApplicationSetting.__tablename__)
         return result
     except HTTPException as ex:
         raise ex
@@ -49,13 +57,23 @@ async def create_application_setting(
 @router.get('/application_settings', response_model=ListResponseSchema)
 async def get_application_settings(
 	current_user: Annotated[User, get_authenticated_user('application_settings.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     params: Annotated[GetListParams, Depends(get_list_params)],
+    cache: Annotated[ResponseCache, Depends(response_cache(ApplicationSetting.__tablename__))],
+    request: Request,
 ):
-    try:
+    if cached := await cache.lookup():
+        return cached
+
+    async def load():
         total, results = await queryutil.get_list(db, ApplicationSetting, params)
         data = [ResponseSchema(**r.model_dump()) for r in results]
         return ListResponseSchema(total=total, data=data)
+
+    try:
+        # Identical concurrent requests (e.g. every dashboard loading at once) share one query
+        response = await flights.do((request_key(request), cache.etag), load)
+        return await cache.store(response)
     except HTTPException as ex:
         raise ex
     except Exception as ex:
@@ -65,15 +83,28 @@ async def get_application_settings(
         ) from ex
 
 
+@router.get('/application_settings/export', response_class=StreamingResponse)
+async def export_application_settings(
+	current_user: Annotated[User, get_authenticated_user('application_settings.read')],
+    params: Annotated[GetListParams, Depends(get_list_params)],
+    format: ExportFormat = ExportFormat.csv,
+):
+    return exportutil.stream_export(ApplicationSetting, params, ResponseSchema, format)
+
+
 @router.get('/application_settings/{id}', response_model=ResponseSchema)
 async def get_application_setting(
 	current_user: Annotated[User, get_authenticated_user('application_settings.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     id: int,
+    cache: Annotated[ResponseCache, Depends(response_cache(ApplicationSetting.__tablename__))],
 ):
+    if cached := await cache.lookup():
+        return cached
+
     try:
         result = await queryutil.get_one(db, ApplicationSetting, id)
-        return result
+        return await cache.store(ResponseSchema(**result.model_dump()))
     except HTTPException as ex:
         raise ex
     except Exception as ex:
@@ -86,7 +117,7 @@ async def get_application_setting(
 @router.patch('/application_settings/{id}', response_model=ResponseSchema)
 async def update_application_setting(
 	current_user: Annotated[User, get_authenticated_user('application_settings.update')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     id: int,
     data: ApplicationSettingUpdate,
 ):
@@ -96,12 +127,12 @@ async def update_application_setting(
     try:
         modified = ModifiedData(**data.model_dump(), modified_by_id=current_user.id)
         result = await queryutil.update_one(db, ApplicationSetting, id, modified)
+        await cacheutil.bump_version(ApplicationSetting.__tablename__)
         return result
     except HTTPException as ex:
         raise ex
     except Exception as ex:
-        import traceback
-        print(traceback.format_exc())
+        logger.exception(f'Failed to update application setting {id}')
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(ex)
@@ -111,11 +142,12 @@ async def update_application_setting(
 @router.delete('/application_settings/{id}', response_model=ActionResponse)
 async def delete_application_setting(
 	current_user: Annotated[User, get_authenticated_user('application_settings.delete')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     id: int,
 ):
     try:
         await queryutil.delete_one(db, ApplicationSetting, id)
+        await cacheutil.bump_version(ApplicationSetting.__tablename__)
         return ActionResponse(
             success=True,
             message='Application Setting deleted successfully'
@@ -3,14 +3,17 @@ from typing import Annotated
 from fastapi import Cookie, Depends, Header, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from itsdangerous import URLSafeTimedSerializer
+from loguru import logger
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from api.database import get_async_db
+from api.database import release_connection
+from api.database.dependencies import get_async_db
 from api.database.models.application_setting import ApplicationSetting
 from api.database.models.role_access_control import RoleAccessControl
 from api.database.models.template import Template
 from api. database.models.user import User
+from api.database.unit_of_work import get_by
 from api.settings import settings
 
 
@@ -28,10 +31,7 @@ async def can_access(
         return True
 
     auth_resources = ['auth.*', 'tfa.*']
-    q = select(RoleAccessControl).where(RoleAccessControl.role == role)
-    q_result = await db.exec(q)
-    result = q_result.first()
-    
+    result = await get_by(db, RoleAccessControl, 'role', role)
     if not result:
         return False
     
@@ -59,14 +59,14 @@ async def get_current_user(
         try:
             user =  await get_user_by_api_key(db, api_key)
         except HTTPException as e:
-            print(f'API Key authentication failed: {str(e)}')
+            logger.debug(f'API Key authentication failed: {str(e)}')
             pass
 
     if access_token:
         try:
             user = await get_user_by_jwt_token(db, access_token)
         except HTTPException as e:
-            print(f'Token authentication failed: {str(e)}')
+            logger.debug(f'Token authentication failed: {str(e)}')
             pass
 
     if not user:
@@ -81,6 +81,12 @@ async def get_current_user(
             detail='User not verified'
         )
 
+    if user.deleted_at is not None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail='User deleted'
+        )
+
     return user
 
 
@@ -93,8 +99,7 @@ async def get_user_by_api_key(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail='API key missing'
         )
-    result = await db.exec(select(User).where(User.api == api_key))
-    user = result.first()
+    user = await get_by(db, User, 'api', api_key)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -117,8 +122,7 @@ async def get_user_by_jwt_token(db: AsyncSession, token: str):
             raise credentials_exception
     except Exception as ex:
         raise credentials_exception from ex
-    result = await db.exec(select(User).where(User.email == username))
-    user = result.first()
+    user = await get_by(db, User, 'email', username)
     if user is None:
         raise credentials_exception
     return user
@@ -136,6 +140,8 @@ def get_authenticated_user(required_permission: str | None = None):
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"No access to {required_permission}",
             )
+        # Nothing was written yet, the handler starts with a fresh transaction
+        await release_connection(db)
         return current_user
 
     return Depends(dependency)
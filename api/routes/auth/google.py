@@ -13,7 +13,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from worker.queue import get_notification_queue
 from worker.tasks.notification import notify_role, notify_user
 
-from api.database import get_async_db
+from api.database.dependencies import get_async_read_db, get_async_write_db
 from api.database.models.user import User
 from api.routes.auth.core import create_access_token
 from api.settings import settings
@@ -57,7 +57,7 @@ def verify_oauth_state(state_token: str) -> OAuthStateSchema:
         payload = serializer.loads(state_token, salt='oauth-state')
         return OAuthStateSchema(**payload)
     except Exception as ex:
-        print(f'Error verifying OAuth state: {ex}')
+        logger.warning(f'Error verifying OAuth state: {ex}')
         return OAuthStateSchema()
 
 
@@ -78,7 +78,7 @@ async def google_login(request: Request, next_url: str = '/', remember: bool = F
 async def google_callback(
     request: Request,
     response: Response,
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     notification_queue: Annotated[Queue, Depends(get_notification_queue)],
     tfa_verified: Annotated[str | None, Cookie()] = None,
     state: str = '',
@@ -95,6 +95,8 @@ async def google_callback(
 
     result = await db.exec(select(User).where(User.email == google_user.email))
     user = result.first()
+    if user and user.deleted_at is not None:
+        raise HTTPException(status_code=401, detail='User not found')
     if not user:
         user = User(
             email=google_user.email,
@@ -106,7 +108,6 @@ async def google_callback(
         )
         db.add(user)
         await db.commit()
-        await db.refresh(user)
 
         notification_queue.enqueue(
             notify_role,
@@ -196,7 +197,7 @@ async def google_callback(
 @router.post('/login_2fa')
 async def login_2fa(
     response: Response,
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     tfa_verified: Annotated[str, Cookie()],
     user_info: Annotated[str, Cookie()],
     remember: bool = False,
@@ -11,8 +11,9 @@ from rq import Queue
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from api.database import get_async_db
+from api.database.dependencies import get_async_read_db, get_async_write_db
 from api.database.models.user import User
+from api.database.unit_of_work import get_by
 from api.settings import settings
 from api.worker.queue import get_email_queue, get_notification_queue
 from api.worker.tasks.email import send_email
@@ -60,10 +61,8 @@ class UpdatePasswordForm(BaseModel):
 
 
 async def authenticate_user(username: str, password: str, db: AsyncSession):
-    query = select(User).where(User.email == username)
-    result = await db.exec(query)
-    user = result.first()
-    if not user:
+    user = await get_by(db, User, 'email', username)
+    if not user or user.deleted_at is not None:
         return None
     if not pwd_context.verify(password, user.password):
         return None
@@ -74,7 +73,7 @@ async def authenticate_user(username: str, password: str, db: AsyncSession):
 async def register_user(
     response: Response,
     data: RegisterForm,
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     notification_queue: Annotated[Queue, Depends(get_notification_queue)],
     email_queue: Annotated[Queue, Depends(get_email_queue)]
 ) -> Response:
@@ -105,7 +104,6 @@ async def register_user(
     )
     db.add(new_user)
     await db.commit()
-    await db.refresh(new_user)
 
     notification_queue.enqueue(
         notify_role,
@@ -170,7 +168,7 @@ async def register_user(
 async def login_user(
     response: Response,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     remember: bool = False,
     tfa_verified: Annotated[str | None, Cookie()] = None,
 ):
@@ -234,14 +232,16 @@ async def login_user(
 @router.post('/forgot_password', response_model=ActionResponse)
 async def forgot_password(
     data: ResetPasswordRequestForm,
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     email_queue: Annotated[Queue, Depends(get_email_queue)]
 ):
     response = ActionResponse(
         success=True,
         message='Password reset link has been sent to your email',
     )
-    result = await db.exec(select(User).where(User.email == data.email))
+    result = await db.exec(
+        select(User).where(User.email == data.email, User.deleted_at == None) # type: ignore # noqa: E711
+    )
     user = result.first()
     if not user:
         return response
@@ -270,7 +270,7 @@ async def forgot_password(
 async def reset_password(
     token: str,
     data: ResetPasswordForm,
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -305,7 +305,7 @@ async def reset_password(
 @router.get('/verify_email', response_model=ActionResponse)
 async def verify_email(
     token: str,
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -336,18 +336,15 @@ async def verify_email(
 @router.post('/update_password', response_model=ActionResponse)
 async def update_password(
     current_user: Annotated[User, get_authenticated_user('auth.update_password')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     data: UpdatePasswordForm,
 ):
-    user = await authenticate_user(current_user.email, data.current_password, db)
-
-    if not user:
+    if not current_user.password or not pwd_context.verify(data.current_password, current_user.password):
         raise HTTPException(status_code=401, detail='Current password is incorrect')
     if data.new_password != data.confirm_password:
         raise HTTPException(status_code=400, detail='New passwords do not match')
     hashed_password = hashed_password = pwd_context.hash(data.new_password)
 
-    user.password = hashed_password
-    db.add(user)
+    current_user.password = hashed_password
     await db.commit()
     return ActionResponse(success=True, message='Password successfully changed')
@@ -7,9 +7,10 @@ from itsdangerous import URLSafeTimedSerializer
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from api.database import get_async_db
+from api.database.dependencies import get_async_read_db, get_async_write_db
 from api.database.models.role_access_control import RoleAccessControl
 from api.database.models.user import User
+from api.database.unit_of_work import get_by
 from api.routes.auth.core import can_access, create_access_token, get_authenticated_user
 from api.routes.auth.google import router as google_router
 from api.routes.auth.native import router as native_router
@@ -35,7 +36,7 @@ class UserAuthSchema(ResponseSchema):
 @router.post('/auth/refresh', tags=TAGS)
 async def refresh_token(
     response: Response,
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     refresh_token: Annotated[str | None, Cookie()] = None,
 ):
     if not refresh_token:
@@ -55,7 +56,9 @@ async def refresh_token(
     except Exception as ex:
         raise credentials_exception from ex
 
-    result = await db.exec(select(User).where(User.email == username))
+    result = await db.exec(
+        select(User).where(User.email == username, User.deleted_at == None) # type: ignore # noqa: E711
+    )
     user = result.first()
     if user is None:
         raise credentials_exception
@@ -98,11 +101,10 @@ async def logout_user(response: Response,):
 @router.get('/auth/me', response_model=UserAuthSchema, tags=TAGS)
 async def me(
     current_user: Annotated[User, get_authenticated_user('auth.me')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
 ):
     permissions = []
-    q = select(RoleAccessControl).where(RoleAccessControl.role == current_user.role)
-    if rbac := (await db.exec(q)).first():
+    if rbac := await get_by(db, RoleAccessControl, 'role', current_user.role):
         permissions = rbac.permissions or []
 
     return UserAuthSchema(**current_user.model_dump(), permissions=permissions)
@@ -113,7 +115,7 @@ async def check_auth(
     resource: str,
     action: str,
     current_user: Annotated[User, get_authenticated_user('auth.check')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
 ):
     permission = f'{resource}.{action}'
     has_access = await can_access(db, permission, current_user.role)
@@ -123,12 +125,11 @@ async def check_auth(
 @router.post('/auth/generate_api_key', tags=TAGS)
 async def generate_api_key(
     current_user: Annotated[User, get_authenticated_user('auth.generate_api_key')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
 ):
     api_key = secrets.token_urlsafe(32)
     current_user.api = api_key
     current_user.verified = True
     db.add(current_user)
     await db.commit()
-    await db.refresh(current_user)
     return current_user
@@ -4,13 +4,14 @@ from typing import Annotated
 import pyotp
 from fastapi import APIRouter, Cookie, Depends, HTTPException, Response, status
 from itsdangerous import URLSafeTimedSerializer
+from loguru import logger
 from pydantic import BaseModel
 from rq import Queue
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from worker.queue import get_email_queue
 
-from api.database import get_async_db
+from api.database.dependencies import get_async_read_db, get_async_write_db
 from api.database.models.user import User
 from api.routes.auth.core import create_access_token, get_authenticated_user, get_template
 from api.settings import settings
@@ -39,11 +40,10 @@ class TfaVerificationResponse(BaseModel):
 async def setup_authenticator_tfa_method(
     response: Response,
     current_user: Annotated[User, get_authenticated_user('tfa.setup')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
 ):
     if not current_user.tfa_secret:
         current_user.tfa_secret = pyotp.random_base32()
-        db.add(current_user)
         await db.commit()
 
     totp = pyotp.TOTP(current_user.tfa_secret)
@@ -68,12 +68,11 @@ async def setup_authenticator_tfa_method(
 async def setup_email_tfa_method(
     response: Response,
     current_user: Annotated[User, get_authenticated_user('tfa.setup')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     email_queue: Annotated[Queue, Depends(get_email_queue)],
 ):
     if not current_user.tfa_secret:
         current_user.tfa_secret = pyotp.random_base32()
-        db.add(current_user)
         await db.commit()
 
     totp = pyotp.TOTP(current_user.tfa_secret, interval=300)
@@ -106,7 +105,7 @@ async def setup_email_tfa_method(
 
 @router.post('/send_email', response_model=EmailSetupResponse)
 async def send_email_tfa_code(
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     email_queue: Annotated[Queue, Depends(get_email_queue)],
     tfa_token: Annotated[str | None, Cookie()] = None,
 ):
@@ -156,7 +155,7 @@ async def verify_tfa_code(
     response: Response,
     method: TfaMethod,
     code: str,
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     tfa_token: Annotated[str | None, Cookie()] = None,
 ):
     if not tfa_token:
@@ -206,13 +205,12 @@ async def verify_tfa_code(
 async def enable_tfa_method(
     method: TfaMethod,
     current_user: Annotated[User, get_authenticated_user('tfa.enable')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
 ):
     if method.value not in current_user.tfa_methods:
         current_user.tfa_methods = current_user.tfa_methods + [method.value]
+        await db.commit()
 
-    db.add(current_user)
-    await db.commit()
     return {'success': True, 'message': f'{method.capitalize()} TFA enabled successfully'}
 
 
@@ -220,12 +218,11 @@ async def enable_tfa_method(
 async def disable_tfa_method(
     method: TfaMethod,
     current_user: Annotated[User, get_authenticated_user('tfa.disable')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
 ):
     if method.value in current_user.tfa_methods:
-        print(f"Disabling {method.value} TFA for user {current_user.email}")
+        logger.info(f'Disabling {method.value} TFA for user {current_user.email}')
         current_user.tfa_methods = [m for m in current_user.tfa_methods if m != method.value]
+        await db.commit()
 
-    db.add(current_user)
-    await db.commit()
     return {'success': True, 'message': f'{method.capitalize()} TFA disabled successfully'}
@@ -0,0 +1,30 @@
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+import api.worker.metrics  # noqa: F401 (registers queue depth and job duration metrics)
+from api.metrics import REGISTRY
+from api.settings import settings
+
+
+router = APIRouter(tags=['Metrics'])
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@router.get('/metrics', include_in_schema=False)
+async def get_metrics(authorization: Annotated[str | None, Header()] = None):
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not authorization or not secrets.compare_digest(authorization, expected):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail='Invalid metrics token',
+            )
+
+    # queue depth and worker metrics are read from Redis, keep that off the event loop
+    body = await run_in_threadpool(REGISTRY.render)
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
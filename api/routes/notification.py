@@ -1,16 +1,29 @@
+import base64
+import json
+from collections.abc import Callable
+from datetime import datetime
+from enum import Enum
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import and_, insert, or_, true, update
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.sql.expression import SelectOfScalar
 
-from api.database import get_async_db
+from api.database import read_and_release
+from api.database.dependencies import get_async_read_db, get_async_write_db
+from api.database.models.broadcast import Broadcast, BroadcastReceipt
 from api.database.models.notification import Notification
 from api.database.models.user import User
 from api.routes.auth import get_authenticated_user
-from api.routes.utils import queryutil
+from api.routes.utils import exportutil, queryutil
 from api.routes.utils.crudutils import ActionResponse, make_crud_schemas
+from api.routes.utils.exportutil import ExportFormat
 from api.routes.utils.queryutil import GetListParams, get_list_params
+from api.settings import settings
 
 
 router = APIRouter(tags=['Notification'])
@@ -24,11 +37,99 @@ NotificationCreate = CreateSchema
 NotificationUpdate = UpdateSchema
 
 
+class SeeAllResponse(ActionResponse):
+    updated: int
+
+
+class FeedKind(str, Enum):
+    notification = 'notification'
+    broadcast = 'broadcast'
+
+
+# Tie breaker between kinds for rows created at the same time, higher comes first
+FEED_KIND_RANK = {FeedKind.notification: 0, FeedKind.broadcast: 1}
+
+
+class FeedItem(BaseModel):
+    id: str
+    kind: FeedKind
+    triggered_by: int
+    title: str
+    body: str
+    category: str
+    seen: bool
+    created_at: datetime
+
+
+class FeedResponse(BaseModel):
+    data: list[FeedItem]
+    next_cursor: str | None
+
+
+def feed_key(item: FeedItem) -> tuple[datetime, int, int]:
+    return item.created_at, FEED_KIND_RANK[item.kind], int(item.id.rsplit(':', 1)[1])
+
+
+def encode_cursor(item: FeedItem) -> str:
+    created_at, rank, id = feed_key(item)
+    return base64.urlsafe_b64encode(json.dumps([created_at.isoformat(), rank, id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, int]:
+    try:
+        created_at, rank, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(rank), int(id)
+    except (ValueError, TypeError) as ex:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid cursor'
+        ) from ex
+
+
+def after_cursor(
+    model_cls: type[Notification] | type[Broadcast],
+    kind: FeedKind,
+    cursor: tuple[datetime, int, int] | None,
+):
+    """Rows of `model_cls` that come after `cursor` in the `(created_at, kind, id)` descending feed order."""
+    if cursor is None:
+        return true()
+    created_at, rank, id = cursor
+    if FEED_KIND_RANK[kind] < rank:
+        return model_cls.created_at <= created_at
+    if FEED_KIND_RANK[kind] > rank:
+        return model_cls.created_at < created_at
+    return or_(
+        model_cls.created_at < created_at,
+        and_(model_cls.created_at == created_at, model_cls.id < id), # type: ignore
+    )
+
+
+def owned_by(
+    user: User,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> Callable[[SelectOfScalar[Notification]], SelectOfScalar[Notification]]:
+    """
+    Restrict queries to the notifications of `user`, created in `[since, until)` when given.
+    The `created_at` bounds let MySQL prune the monthly partitions outside the range.
+    """
+    def transform(query: SelectOfScalar[Notification]) -> SelectOfScalar[Notification]:
+        query = query.where(Notification.user_id == user.id)
+        if since is not None:
+            query = query.where(Notification.created_at >= since)
+        if until is not None:
+            query = query.where(Notification.created_at < until)
+        return query
+
+    return transform
+
+
 @router.post('/notifications', response_model=ResponseSchema)
 async def create_notification(
     data: NotificationCreate,
 	current_user: Annotated[User, get_authenticated_user('notifications.create')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
 ):
     try:
         if not await db.get(User, data.user_id): # type: ignore
@@ -52,13 +153,13 @@ async def create_notification(
 @router.get('/notifications', response_model=ListResponseSchema)
 async def get_notifications(
 	current_user: Annotated[User, get_authenticated_user('notifications.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     params: Annotated[GetListParams, Depends(get_list_params)],
+    since: Annotated[datetime | None, Query(description='Only notifications created at or after')] = None,
+    until: Annotated[datetime | None, Query(description='Only notifications created before')] = None,
 ):
     try:
-        def transform(query: SelectOfScalar[Notification]) -> SelectOfScalar[Notification]:
-            return query.where(Notification.user_id == current_user.id)
-
+        transform = owned_by(current_user, since, until)
         total, results = await queryutil.get_list(db, Notification, params, transform=transform)
         data = [ResponseSchema(**r.model_dump()) for r in results]
         return ListResponseSchema(total=total, data=data)
@@ -71,17 +172,84 @@ async def get_notifications(
         ) from ex
 
 
+@router.get('/notifications/export', response_class=StreamingResponse)
+async def export_notifications(
+	current_user: Annotated[User, get_authenticated_user('notifications.read')],
+    params: Annotated[GetListParams, Depends(get_list_params)],
+    format: ExportFormat = ExportFormat.csv,
+    since: Annotated[datetime | None, Query(description='Only notifications created at or after')] = None,
+    until: Annotated[datetime | None, Query(description='Only notifications created before')] = None,
+):
+    transform = owned_by(current_user, since, until)
+    return exportutil.stream_export(Notification, params, ResponseSchema, format, transform=transform)
+
+
+@router.get('/notifications/feed', response_model=FeedResponse)
+async def get_notification_feed(
+    current_user: Annotated[User, get_authenticated_user('notifications.read')],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
+    limit: Annotated[int, Query(ge=1, le=100, description='Limit number of results')] = 20,
+    cursor: Annotated[str | None, Query(description='`next_cursor` of the previous page')] = None,
+):
+    """
+    Personal notifications and the broadcasts of the user's role, newest first.
+    Paginated by keyset: each source is read from its index past `cursor`, never with an offset.
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    personal = (
+        select(Notification)
+        .where(
+            Notification.user_id == current_user.id,
+            after_cursor(Notification, FeedKind.notification, after),
+        )
+        .order_by(Notification.created_at.desc(), Notification.id.desc()) # type: ignore
+        .limit(limit + 1)
+    )
+    broadcasts = (
+        select(Broadcast, BroadcastReceipt.user_id)
+        .outerjoin(BroadcastReceipt, and_(
+            BroadcastReceipt.broadcast_id == Broadcast.id,
+            BroadcastReceipt.user_id == current_user.id,
+        )) # type: ignore
+        .where(
+            Broadcast.role == current_user.role,
+            Broadcast.created_at >= current_user.created_at,
+            after_cursor(Broadcast, FeedKind.broadcast, after),
+        )
+        .order_by(Broadcast.created_at.desc(), Broadcast.id.desc()) # type: ignore
+        .limit(limit + 1)
+    )
+    async with read_and_release(db):
+        notifications = (await db.exec(personal)).all()
+        received = (await db.exec(broadcasts)).all()
+
+    items = [
+        FeedItem(**n.model_dump(exclude={'id'}), id=f'{FeedKind.notification.value}:{n.id}', kind=FeedKind.notification)
+        for n in notifications
+    ] + [
+        FeedItem(
+            **b.model_dump(exclude={'id'}),
+            id=f'{FeedKind.broadcast.value}:{b.id}',
+            kind=FeedKind.broadcast,
+            seen=receipt is not None,
+        )
+        for b, receipt in received
+    ]
+    items.sort(key=feed_key, reverse=True)
+
+    next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return FeedResponse(data=items[:limit], next_cursor=next_cursor)
+
+
 @router.get('/notifications/{id}', response_model=ResponseSchema)
 async def get_notification(
 	current_user: Annotated[User, get_authenticated_user('notifications.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     id: int,
 ):
     try:
-        def transform(query: SelectOfScalar[Notification]) -> SelectOfScalar[Notification]:
-            return query.where(Notification.user_id == current_user.id)
-
-        result = await queryutil.get_one(db, Notification, id, transform=transform)
+        result = await queryutil.get_one(db, Notification, id, transform=owned_by(current_user))
         return result
     except HTTPException as ex:
         raise ex
@@ -92,22 +260,98 @@ async def get_notification(
         ) from ex
 
 
-@router.patch('/notifications/see_all', response_model=ActionResponse)
+@router.patch('/notifications/see_all', response_model=SeeAllResponse)
 async def see_all_notifications(
     current_user: Annotated[User, get_authenticated_user('notifications.see_all')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
+    before: Annotated[datetime | None, Query(description='Only notifications created before')] = None,
 ):
+    """
+    Mark the unseen notifications of the current user as seen, in primary key ordered chunks of
+    `NOTIFICATION_SEE_ALL_CHUNK_SIZE` rows committed one at a time, so a long history never ends up
+    in a single large transaction and rows already seen are not rewritten. Receipts are written
+    the same way for the broadcasts of the user's role not seen yet.
+    """
     try:
-        statement = (
-            Notification.__table__.update() # type: ignore
-            .where(Notification.user_id == current_user.id)
-            .values(seen=True)
-        )
-        await db.exec(statement)
-        await db.commit()
-        return ActionResponse(
+        chunk_size = settings.NOTIFICATION_SEE_ALL_CHUNK_SIZE
+        updated, last_id = 0, 0
+        while True:
+            query = (
+                select(Notification.id, Notification.created_at)
+                .where(
+                    Notification.user_id == current_user.id,
+                    Notification.seen == False, # type: ignore # noqa: E712
+                    Notification.id > last_id, # type: ignore
+                )
+                .order_by(Notification.id) # type: ignore
+                .limit(chunk_size)
+            )
+            if before is not None:
+                query = query.where(Notification.created_at < before)
+            rows = (await db.exec(query)).all()
+            if not rows:
+                break
+
+            ids = [id for id, _ in rows]
+            created = [created_at for _, created_at in rows]
+            statement = (
+                update(Notification)
+                .where(
+                    Notification.id.in_(ids), # type: ignore
+                    # Bounds the partitions probed to the months the chunk spans
+                    Notification.created_at.between(min(created), max(created)), # type: ignore
+                    Notification.seen == False, # type: ignore # noqa: E712
+                )
+                .values(seen=True)
+            )
+            result = await db.exec(statement) # type: ignore
+            await db.commit()
+            updated += result.rowcount
+            last_id = ids[-1]
+            if len(rows) < chunk_size:
+                break
+
+        # Broadcasts are marked as seen by writing the receipts that are missing
+        last_id = 0
+        while True:
+            query = (
+                select(Broadcast.id)
+                .outerjoin(BroadcastReceipt, and_(
+                    BroadcastReceipt.broadcast_id == Broadcast.id,
+                    BroadcastReceipt.user_id == current_user.id,
+                )) # type: ignore
+                .where(
+                    Broadcast.role == current_user.role,
+                    Broadcast.created_at >= current_user.created_at,
+                    BroadcastReceipt.broadcast_id == None, # type: ignore # noqa: E711
+                    Broadcast.id > last_id, # type: ignore
+                )
+                .order_by(Broadcast.id) # type: ignore
+                .limit(chunk_size)
+            )
+            if before is not None:
+                query = query.where(Broadcast.created_at < before)
+            ids = (await db.exec(query)).all()
+            if not ids:
+                break
+
+            seen_at = datetime.now()
+            statement = (
+                insert(BroadcastReceipt)
+                .values([{'broadcast_id': id, 'user_id': current_user.id, 'seen_at': seen_at} for id in ids])
+                .prefix_with('IGNORE', dialect='mysql') # concurrent see_all of the same user
+            )
+            result = await db.exec(statement) # type: ignore
+            await db.commit()
+            updated += result.rowcount
+            last_id = ids[-1]
+            if len(ids) < chunk_size:
+                break
+
+        return SeeAllResponse(
             success=True,
-            message='All notifications marked as seen'
+            message='All notifications marked as seen',
+            updated=updated,
         )
     except HTTPException as ex:
         raise ex
@@ -121,7 +365,7 @@ async def see_all_notifications(
 @router.patch('/notifications/{id}', response_model=ResponseSchema)
 async def update_notification(
 	current_user: Annotated[User, get_authenticated_user('notifications.update')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     id: int,
     data: NotificationUpdate,
 ):
@@ -140,7 +384,7 @@ async def update_notification(
 @router.delete('/notifications/{id}', response_model=ActionResponse)
 async def delete_notification(
 	current_user: Annotated[User, get_authenticated_user('notifications.delete')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     id: int,
 ):
     try:
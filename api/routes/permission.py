@@ -2,31 +2,52 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 
 from api.database.models.user import User
 from api.routes.auth import get_authenticated_user
 from api.routes.auth.core import all_permissions
+from api.routes.utils.cacheutil import ResponseCache, response_cache
+from api.routes.utils.singleflight import SingleFlight, request_key
 
 
 router = APIRouter(tags=['Permission'])
+flights = SingleFlight()
 
 class PermissionListResponse(BaseModel):
     total: int
     data: list[dict]
 
 
+def sorted_permissions() -> list[str]:
+    # Sorted so ids and the ETag are identical across processes, set order depends on the hash seed
+    return sorted(all_permissions, key=str)
+
+
+def permissions_version() -> str:
+    # Permissions are registered by the routes at import time, they only change on deploy
+    return ','.join(str(perm) for perm in sorted_permissions())
+
+
 @router.get('/permissions', response_model=PermissionListResponse)
 async def get_all_permissions(
     current_user: Annotated[User, get_authenticated_user('permissions.read')],
+    cache: Annotated[ResponseCache, Depends(response_cache(version=permissions_version))],
+    request: Request,
 ):
-    data = [
-        {
-            "id": idx,
-            "name": perm
-        }
-        for idx, perm in enumerate(all_permissions)
-    ]
-
-    return PermissionListResponse(total=len(all_permissions), data=data)
+    if cached := await cache.lookup():
+        return cached
+
+    async def load():
+        data = [
+            {
+                "id": idx,
+                "name": perm
+            }
+            for idx, perm in enumerate(sorted_permissions())
+        ]
+        return PermissionListResponse(total=len(all_permissions), data=data)
+
+    response = await flights.do(request_key(request), load)
+    return await cache.store(response)
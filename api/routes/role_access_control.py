@@ -1,19 +1,24 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from loguru import logger
 from pydantic import BaseModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from api.database import get_async_db
+from api.database.dependencies import get_async_read_db, get_async_write_db
 from api.database.models.role_access_control import RoleAccessControl
 from api.database.models.user import User
 from api.routes.auth import get_authenticated_user
-from api.routes.utils import queryutil
+from api.routes.utils import cacheutil, exportutil, querycache, queryutil
+from api.routes.utils.cacheutil import ResponseCache, response_cache
 from api.routes.utils.crudutils import ActionResponse, make_crud_schemas
+from api.routes.utils.exportutil import ExportFormat
 from api.routes.utils.queryutil import GetListParams, get_list_params
 
 
 router = APIRouter(tags=['RoleAccessControl'])
+querycache.register(RoleAccessControl)
 
 CreateSchema, UpdateSchema, ResponseSchema, ListResponseSchema = make_crud_schemas(RoleAccessControl)
 RoleAccessControlCreate = CreateSchema
@@ -28,11 +33,12 @@ class PermissionListResponse(BaseModel):
 async def create_role_access_control(
     data: RoleAccessControlCreate,
 	current_user: Annotated[User, get_authenticated_user('role_access_controls.create')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
 ):
     try:
         obj = RoleAccessControl(**data.model_dump(), modified_by_id=current_user.id)
         result = await queryutil.create_one(db, obj)
+        await cacheutil.bump_version(RoleAccessControl.__tablename__)
         return result
     except HTTPException as ex:
         raise ex
@@ -46,13 +52,17 @@ async def create_role_access_control(
 @router.get('/role_access_controls', response_model=ListResponseSchema)
 async def get_role_access_controls(
 	current_user: Annotated[User, get_authenticated_user('role_access_controls.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     params: Annotated[GetListParams, Depends(get_list_params)],
+    cache: Annotated[ResponseCache, Depends(response_cache(RoleAccessControl.__tablename__))],
 ):
+    if cached := await cache.lookup():
+        return cached
+
     try:
         total, results = await queryutil.get_list(db, RoleAccessControl, params)
         data = [ResponseSchema(**r.model_dump()) for r in results]
-        return ListResponseSchema(total=total, data=data)
+        return await cache.store(ListResponseSchema(total=total, data=data))
     except HTTPException as ex:
         raise ex
     except Exception as ex:
@@ -62,15 +72,28 @@ async def get_role_access_controls(
         ) from ex
 
 
+@router.get('/role_access_controls/export', response_class=StreamingResponse)
+async def export_role_access_controls(
+	current_user: Annotated[User, get_authenticated_user('role_access_controls.read')],
+    params: Annotated[GetListParams, Depends(get_list_params)],
+    format: ExportFormat = ExportFormat.csv,
+):
+    return exportutil.stream_export(RoleAccessControl, params, ResponseSchema, format)
+
+
 @router.get('/role_access_controls/{id}', response_model=ResponseSchema)
 async def get_role_access_control(
 	current_user: Annotated[User, get_authenticated_user('role_access_controls.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     id: int,
+    cache: Annotated[ResponseCache, Depends(response_cache(RoleAccessControl.__tablename__))],
 ):
+    if cached := await cache.lookup():
+        return cached
+
     try:
         result = await queryutil.get_one(db, RoleAccessControl, id)
-        return result
+        return await cache.store(ResponseSchema(**result.model_dump()))
     except HTTPException as ex:
         raise ex
     except Exception as ex:
@@ -83,7 +106,7 @@ async def get_role_access_control(
 @router.patch('/role_access_controls/{id}', response_model=ResponseSchema)
 async def update_role_access_control(
 	current_user: Annotated[User, get_authenticated_user('role_access_controls.update')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     id: int,
     data: RoleAccessControlUpdate,
 ):
@@ -93,11 +116,12 @@ async def update_role_access_control(
 
         updated_data = UpdatedData(**data.model_dump(), modified_by_id=current_user.id)
         result = await queryutil.update_one(db, RoleAccessControl, id, updated_data)
+        await cacheutil.bump_version(RoleAccessControl.__tablename__)
         return result
     except HTTPException as ex:
         raise ex
     except Exception as ex:
-        print(ex)
+        logger.exception(f'Failed to update role access control {id}')
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(ex)
@@ -107,11 +131,12 @@ async def update_role_access_control(
 @router.delete('/role_access_controls/{id}', response_model=ActionResponse)
 async def delete_role_access_control(
 	current_user: Annotated[User, get_authenticated_user('role_access_controls.delete')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     id: int,
 ):
     try:
         await queryutil.delete_one(db, RoleAccessControl, id)
+        await cacheutil.bump_version(RoleAccessControl.__tablename__)
         return ActionResponse(
             success=True,
             message='Application Setting deleted successfully'
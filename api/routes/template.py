@@ -4,18 +4,22 @@ from pathlib import Path
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from api.database import get_async_db
+from api.database.dependencies import get_async_read_db, get_async_write_db
 from api.database.models.template import Template
 from api.database.models.user import User
 from api.routes.auth import get_authenticated_user
-from api.routes.utils import queryutil
+from api.routes.utils import cacheutil, exportutil, querycache, queryutil
+from api.routes.utils.cacheutil import ResponseCache, response_cache
 from api.routes.utils.crudutils import ActionResponse, make_crud_schemas
+from api.routes.utils.exportutil import ExportFormat
 from api.routes.utils.queryutil import GetListParams, get_list_params
 
 
 router = APIRouter(tags=['Template'])
+querycache.register(Template)
 TEMPLATE_PATH = Path(__file__).parent.parent / 'templates'
 
 CreateSchema, UpdateSchema, ResponseSchema, ListResponseSchema = make_crud_schemas(
@@ -38,7 +42,7 @@ def get_template_content(template: Template) -> str:
 @router.post('/templates', response_model=ResponseSchema)
 async def create_template(
 	current_user: Annotated[User, get_authenticated_user('templates.create')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     data: TemplateCreate,
 ):
     try:
@@ -52,6 +56,7 @@ async def create_template(
         obj.path = str(file_path)
         obj.modified_by_id = current_user.id
         result = await queryutil.create_one(db, obj)
+        await cacheutil.bump_version(Template.__tablename__)
         return ResponseSchema(**result.model_dump(), content=get_template_content(result))
     except HTTPException as ex:
         raise ex
@@ -65,13 +70,17 @@ async def create_template(
 @router.get('/templates', response_model=ListResponseSchema)
 async def get_templates(
 	current_user: Annotated[User, get_authenticated_user('templates.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     params: Annotated[GetListParams, Depends(get_list_params)],
+    cache: Annotated[ResponseCache, Depends(response_cache(Template.__tablename__))],
 ):
+    if cached := await cache.lookup():
+        return cached
+
     try:
         total, results = await queryutil.get_list(db, Template, params)
         data = [ResponseSchema(**r.model_dump(), content=get_template_content(r)) for r in results]
-        return ListResponseSchema(total=total, data=data)
+        return await cache.store(ListResponseSchema(total=total, data=data))
     except HTTPException as ex:
         raise ex
     except Exception as ex:
@@ -81,15 +90,31 @@ async def get_templates(
         ) from ex
 
 
+@router.get('/templates/export', response_class=StreamingResponse)
+async def export_templates(
+	current_user: Annotated[User, get_authenticated_user('templates.read')],
+    params: Annotated[GetListParams, Depends(get_list_params)],
+    format: ExportFormat = ExportFormat.csv,
+):
+    def serialize(template: Template):
+        return ResponseSchema(**template.model_dump(), content=get_template_content(template))
+
+    return exportutil.stream_export(Template, params, ResponseSchema, format, serialize=serialize)
+
+
 @router.get('/templates/{id}', response_model=ResponseSchema)
 async def get_template(
 	current_user: Annotated[User, get_authenticated_user('templates.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     id: int,
+    cache: Annotated[ResponseCache, Depends(response_cache(Template.__tablename__))],
 ):
+    if cached := await cache.lookup():
+        return cached
+
     try:
         result = await queryutil.get_one(db, Template, id)
-        return ResponseSchema(**result.model_dump(), content=get_template_content(result))
+        return await cache.store(ResponseSchema(**result.model_dump(), content=get_template_content(result)))
     except HTTPException as ex:
         raise ex
     except Exception as ex:
@@ -102,7 +127,7 @@ async def get_template(
 @router.patch('/templates/{id}', response_model=ResponseSchema)
 async def update_template(
 	current_user: Annotated[User, get_authenticated_user('templates.update')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     id: int,
     data: TemplateUpdate,
 ):
@@ -119,7 +144,8 @@ async def update_template(
         template.modified_by_id = current_user.id
         db.add(template)
         await db.commit()
-        await db.refresh(template)
+        await cacheutil.bump_version(Template.__tablename__)
+        await querycache.invalidate(Template, [id])
         return ResponseSchema(**template.model_dump(), content=get_template_content(template))
     except HTTPException as ex:
         raise ex
@@ -133,11 +159,12 @@ async def update_template(
 @router.delete('/templates/{id}', response_model=ActionResponse)
 async def delete_template(
 	current_user: Annotated[User, get_authenticated_user('templates.delete')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
     id: int,
 ):
     try:
         await queryutil.delete_one(db, Template, id)
+        await cacheutil.bump_version(Template.__tablename__)
         return ActionResponse(
             success=True,
             message='Template deleted successfully'
@@ -1,56 +1,110 @@
-import uuid
-from pathlib import Path
+from datetime import datetime
 from typing import Annotated
 
 import pyotp
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from passlib.context import CryptContext
-from sqlalchemy import or_
-from sqlmodel import delete, select
+from pydantic import BaseModel, Field, ValidationError
+from rq import Queue
+from sqlalchemy import update
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+from starlette.concurrency import run_in_threadpool
 
 from api.constants import ApplicationSettings, VerificationMethod
-from api.database import get_async_db
+from api.database.dependencies import get_async_read_db, get_async_write_db
 from api.database.models.application_setting import ApplicationSetting
-from api.database.models.notification import Notification
 from api.database.models.user import User
 from api.routes.auth import get_authenticated_user
-from api.routes.utils import queryutil
+from api.routes.utils import exportutil, importutil, queryutil
 from api.routes.utils.crudutils import ActionResponse, make_crud_schemas
-from api.routes.utils.fileutil import save_base64_image
+from api.routes.utils.exportutil import ExportFormat
+from api.routes.utils.fileutil import PROFILE_DIR, decode_base64_image, is_processed, profile_url, stage_upload
+from api.routes.utils.importutil import ImportFormat, ImportReport
 from api.routes.utils.queryutil import GetListParams, get_list_params
+from api.routes.utils.uploadutil import receive_image_upload
+from api.settings import settings
+from api.worker.queue import get_image_queue, get_notification_queue
+from api.worker.tasks.image import process_profile_image
+from api.worker.tasks.user import purge_deleted_users
 
 
 router = APIRouter(tags=['User'])
-PROFILE_DIR = Path(__file__).resolve().parent.parent / "static" / "profiles"
 PROFILE_DIR.mkdir(parents=True, exist_ok=True)
 
 pwd_context = CryptContext(schemes=['argon2'], deprecated='auto')
 
 CreateSchema, UpdateSchema, ResponseSchema, ListResponseSchema = make_crud_schemas(
     User,
-    addtl_excluded_create_fields=['tfa_methods', 'tfa_secret'],
-    addtl_excluded_response_fields=['tfa_secret'],
-    addtl_excluded_update_fields=['tfa_methods', 'tfa_secret'],
+    addtl_excluded_create_fields=['tfa_methods', 'tfa_secret', 'deleted_at'],
+    addtl_excluded_response_fields=['tfa_secret', 'deleted_at'],
+    addtl_excluded_update_fields=['tfa_methods', 'tfa_secret', 'deleted_at'],
 )
 UserCreate = CreateSchema
 UserUpdate = UpdateSchema
 
 
+class DeleteUsersFilter(BaseModel):
+    id: list[int] = Field(min_length=1, max_length=1000)
+
+
+def not_deleted(query: SelectOfScalar[User]) -> SelectOfScalar[User]:
+    return query.where(User.deleted_at == None) # type: ignore # noqa: E711
+
+
+async def soft_delete_users(db: AsyncSession, notification_queue: Queue, ids: list[int]) -> list[int]:
+    """
+    Mark users as deleted and leave the removal of their notifications (and of the users
+    themselves) to the `purge_deleted_users` task. Returns the ids that were not deleted yet.
+    """
+    result = await db.exec(not_deleted(select(User.id).where(User.id.in_(ids)))) # type: ignore
+    ids = list(result.all())
+    if not ids:
+        return ids
+
+    await db.exec(update(User).where(User.id.in_(ids)).values(deleted_at=datetime.now())) # type: ignore
+    await db.commit()
+    notification_queue.enqueue(purge_deleted_users)
+    return ids
+
+
+def is_upload(profile: str | None) -> bool:
+    # Anything but a stored profile url is an uploaded base64 image
+    return bool(profile) and not profile.startswith('/static/') # type: ignore
+
+
+async def stage_profile(profile: str) -> str:
+    """Decode and validate a base64 profile image off the event loop and stage it for the image worker."""
+    image = await run_in_threadpool(decode_base64_image, profile)
+    if image is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid profile image')
+    if len(image) > settings.PROFILE_IMAGE_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail='Profile image too large')
+    return await run_in_threadpool(stage_upload, image)
+
+
+def enqueue_profile(image_queue: Queue, digest: str, user_id: int):
+    if is_processed(digest):
+        return
+    image_queue.enqueue(process_profile_image, digest=digest, user_id=user_id)
+
+
 @router.post('/users', response_model=ResponseSchema)
 async def create_user(
     current_user: Annotated[User, get_authenticated_user('users.create')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
+    image_queue: Annotated[Queue, Depends(get_image_queue)],
     data: UserCreate,
 ):
     try:
         data.password = pwd_context.hash(data.password) # type: ignore
 
-        if data.profile: # type: ignore
-            uuid_str = str(uuid.uuid4())
-            file_path = PROFILE_DIR / uuid_str
-            if saved_path := save_base64_image(data.profile, str(file_path)): # type: ignore
-                data.profile = f'/static/profiles/{Path(saved_path).name}' # type: ignore
+        digest = None
+        if is_upload(data.profile): # type: ignore
+            digest = await stage_profile(data.profile) # type: ignore
+            data.profile = profile_url(digest) # type: ignore
 
         result = await db.exec(
             select(ApplicationSetting)
@@ -65,6 +119,8 @@ async def create_user(
 
         obj = User(**data.model_dump(), tfa_secret=pyotp.random_base32())
         result = await queryutil.create_one(db, obj)
+        if digest:
+            enqueue_profile(image_queue, digest, result.id)
         return result
     except HTTPException as ex:
         raise ex
@@ -75,14 +131,39 @@ async def create_user(
         ) from ex
 
 
+@router.post('/users/import', response_model=ImportReport)
+async def import_users(
+    current_user: Annotated[User, get_authenticated_user('users.create')],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
+    request: Request,
+    format: ImportFormat = ImportFormat.csv,
+    chunk_size: Annotated[int, Query(ge=1, le=5000)] = importutil.IMPORT_CHUNK_SIZE,
+):
+    """
+    Bulk create users from a CSV (with header) or JSON lines request body, parsed as it streams in.
+    Rows are validated like `POST /users`; invalid or duplicate rows are listed in the report.
+    """
+    try:
+        lines = importutil.iter_lines(request.stream())
+        records = importutil.iter_records(lines, format)
+        return await importutil.import_users(db, records, UserCreate, chunk_size)
+    except HTTPException as ex:
+        raise ex
+    except Exception as ex:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(ex)
+        ) from ex
+
+
 @router.get('/users', response_model=ListResponseSchema)
 async def get_users(
     current_user: Annotated[User, get_authenticated_user('users.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     params: Annotated[GetListParams, Depends(get_list_params)],
 ):
     try:
-        total, results = await queryutil.get_list(db, User, params)
+        total, results = await queryutil.get_list(db, User, params, transform=not_deleted)
         data = [ResponseSchema(**r.model_dump()) for r in results]
         return ListResponseSchema(total=total, data=data)
     except HTTPException as ex:
@@ -94,14 +175,23 @@ async def get_users(
         ) from ex
 
 
+@router.get('/users/export', response_class=StreamingResponse)
+async def export_users(
+    current_user: Annotated[User, get_authenticated_user('users.read')],
+    params: Annotated[GetListParams, Depends(get_list_params)],
+    format: ExportFormat = ExportFormat.csv,
+):
+    return exportutil.stream_export(User, params, ResponseSchema, format, transform=not_deleted)
+
+
 @router.get('/users/{id}', response_model=ResponseSchema)
 async def get_user(
     current_user: Annotated[User, get_authenticated_user('users.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_read_db)],
     id: int,
 ):
     try:
-        result = await queryutil.get_one(db, User, id)
+        result = await queryutil.get_one(db, User, id, transform=not_deleted)
         return result
     except HTTPException as ex:
         raise ex
@@ -115,18 +205,20 @@ async def get_user(
 @router.patch('/users/{id}', response_model=ResponseSchema)
 async def update_user(
 	current_user: Annotated[User, get_authenticated_user('users.read')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
+    image_queue: Annotated[Queue, Depends(get_image_queue)],
     id: int,
     data: UserUpdate,
 ):
     try:
-        if data.profile: # type: ignore
-            uuid_str = str(uuid.uuid4())
-            file_path = PROFILE_DIR / uuid_str
-            if saved_path := save_base64_image(data.profile, str(file_path)): # type: ignore
-                data.profile = f'/static/profiles/{Path(saved_path).name}' # type: ignore
+        digest = None
+        if is_upload(data.profile): # type: ignore
+            digest = await stage_profile(data.profile) # type: ignore
+            data.profile = profile_url(digest) # type: ignore
 
-        result = await queryutil.update_one(db, User, id, data)
+        result = await queryutil.update_one(db, User, id, data, transform=not_deleted)
+        if digest:
+            enqueue_profile(image_queue, digest, id)
         return result
     except HTTPException as ex:
         raise ex
@@ -137,22 +229,77 @@ async def update_user(
         ) from ex
 
 
+@router.post(
+    '/users/{id}/profile',
+    response_model=ResponseSchema,
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                'multipart/form-data': {
+                    'schema': {
+                        'type': 'object',
+                        'properties': {'file': {'type': 'string', 'format': 'binary'}},
+                        'required': ['file'],
+                    },
+                },
+            },
+        },
+    },
+)
+async def upload_user_profile(
+    current_user: Annotated[User, get_authenticated_user('users.update')],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
+    image_queue: Annotated[Queue, Depends(get_image_queue)],
+    request: Request,
+    id: int,
+):
+    """
+    Upload a profile image as the `file` field of a multipart/form-data body.
+    The body is streamed to disk with `PROFILE_IMAGE_MAX_BYTES` enforced while reading,
+    base64 images in the JSON body of create/update are still accepted.
+    """
+    user = await queryutil.get_one(db, User, id, transform=not_deleted)
+    digest = await receive_image_upload(request, 'file', settings.PROFILE_IMAGE_MAX_BYTES)
+
+    user.profile = profile_url(digest)
+    db.add(user)
+    await db.commit()
+    enqueue_profile(image_queue, digest, id)
+    return user
+
+
+@router.delete('/users', response_model=list[int])
+async def delete_users(
+    current_user: Annotated[User, get_authenticated_user('users.delete')],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
+    notification_queue: Annotated[Queue, Depends(get_notification_queue)],
+    filter: Annotated[str, Query(description='JSON encoded `{"id": [...]}` of the users to delete')],
+):
+    """Delete many users at once, returns the ids that were deleted."""
+    try:
+        ids = DeleteUsersFilter.model_validate_json(filter).id
+    except ValidationError as ex:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'Invalid filter: {ex}'
+        ) from ex
+
+    return await soft_delete_users(db, notification_queue, ids)
+
+
 @router.delete('/users/{id}', response_model=ActionResponse)
 async def delete_user(
     current_user: Annotated[User, get_authenticated_user('users.delete')],
-    db: Annotated[AsyncSession, Depends(get_async_db)],
+    db: Annotated[AsyncSession, Depends(get_async_write_db)],
+    notification_queue: Annotated[Queue, Depends(get_notification_queue)],
     id: int,
 ):
-    user = await queryutil.get_one(db, User, id)
-    query = delete(Notification).where(
-        or_(
-            Notification.user_id == user.id, # type: ignore
-            Notification.triggered_by == user.id # type: ignore
-        )
-    )
-    await db.exec(query) # type: ignore
-    await db.delete(user)
-    await db.commit()
+    """
+    The user is marked as deleted right away, its notifications are removed in batches by the worker.
+    """
+    user = await queryutil.get_one(db, User, id, transform=not_deleted)
+    await soft_delete_users(db, notification_queue, [user.id])
 
     return ActionResponse(
         success=True,
@@ -0,0 +1,140 @@
+import hashlib
+from collections.abc import Callable
+from uuid import uuid4
+
+from fastapi import Request, Response, status
+from loguru import logger
+from pydantic import BaseModel
+
+from api.metrics import InstrumentedAsyncRedis
+from api.settings import settings
+
+
+VERSION_KEY_PREFIX = 'cache:version:'
+BODY_KEY_PREFIX = 'cache:body:'
+
+redis_client = InstrumentedAsyncRedis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=0,
+)
+
+
+async def get_version(table: str) -> str | None:
+    """
+    Current version of `table`, None when Redis is unavailable (caching is then skipped).
+
+    Versions are random tokens rather than counters: a key lost to a restart, flush, eviction or
+    its `RESPONSE_CACHE_VERSION_TTL` is replaced by a fresh token, so ETags handed out before can
+    never match again. The TTL also bounds how long writes that do not bump the version (worker
+    tasks, migrations, scripts) keep stale responses around.
+    """
+    key = f'{VERSION_KEY_PREFIX}{table}'
+    try:
+        version = await redis_client.get(key)
+        if version is None:
+            # Concurrent requests agree on whichever token was set first
+            await redis_client.set(key, uuid4().hex, nx=True, ex=settings.RESPONSE_CACHE_VERSION_TTL)
+            version = await redis_client.get(key)
+    except Exception as ex:
+        logger.warning(f'Failed to read cache version of `{table}`: {ex}')
+        return None
+    if version is None:
+        return None
+    return version.decode() if isinstance(version, bytes) else str(version)
+
+
+async def bump_version(*tables: str):
+    """Invalidate cached responses of `tables`, call after a successful commit."""
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for table in tables:
+            pipe.set(f'{VERSION_KEY_PREFIX}{table}', uuid4().hex, ex=settings.RESPONSE_CACHE_VERSION_TTL)
+        await pipe.execute()
+    except Exception as ex:
+        logger.warning(f'Failed to bump cache version of {tables}: {ex}')
+
+
+def compute_etag(*parts) -> str:
+    digest = hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+class ResponseCache:
+    """
+    Conditional GET for one request. The ETag is derived from the table version and the
+    request URL, so any create/update/delete bumping the version invalidates every cached
+    list and detail response of that table at once.
+    """
+
+    def __init__(self, request: Request, etag: str | None, ttl: int):
+        self.request = request
+        self.etag = etag
+        self.ttl = ttl
+        self.body_key = BODY_KEY_PREFIX + etag.strip('"') if etag else None
+
+    @property
+    def headers(self) -> dict[str, str]:
+        if self.etag is None:
+            return {}
+        return {'ETag': self.etag, 'Cache-Control': 'private, no-cache'}
+
+    async def lookup(self) -> Response | None:
+        """Return a 304 or the stored body when the request can be answered without the DB."""
+        if self.etag is None:
+            return None
+        if etag_matches(self.request.headers.get('if-none-match'), self.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=self.headers)
+        if self.ttl and self.body_key:
+            try:
+                body = await redis_client.get(self.body_key)
+            except Exception as ex:
+                logger.warning(f'Failed to read cached response: {ex}')
+                body = None
+            if body is not None:
+                return Response(content=body, media_type='application/json', headers=self.headers)
+        return None
+
+    async def store(self, model: BaseModel) -> Response:
+        body = model.model_dump_json()
+        if self.ttl and self.body_key:
+            try:
+                await redis_client.set(self.body_key, body, ex=self.ttl)
+            except Exception as ex:
+                logger.warning(f'Failed to store cached response: {ex}')
+        return Response(content=body, media_type='application/json', headers=self.headers)
+
+
+def response_cache(
+    table: str | None = None,
+    version: Callable[[], str] | None = None,
+    ttl: int | None = None,
+):
+    """
+    Dependency factory for cacheable GET endpoints. Either `table`, whose version token is kept
+    in Redis and replaced by `bump_version`, or a `version` callable (e.g. hashing in-process data).
+    Declare it after the authentication dependency so cached data is never served unauthenticated.
+    """
+    ttl = settings.RESPONSE_CACHE_TTL if ttl is None else ttl
+
+    async def dependency(request: Request) -> ResponseCache:
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return ResponseCache(request, None, 0)
+
+        current = version() if version is not None else None
+        if table is not None:
+            current = await get_version(table)
+        if current is None:
+            return ResponseCache(request, None, 0)
+
+        etag = compute_etag(table, current, request.url.path, request.url.query)
+        return ResponseCache(request, etag, ttl)
+
+    return dependency
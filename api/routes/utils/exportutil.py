@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+from collections.abc import Callable
+from enum import Enum
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlmodel import SQLModel
+from sqlmodel.sql.expression import SelectOfScalar
+from starlette.concurrency import run_in_threadpool
+
+from api.database import get_async_session
+from api.database.routing import REPLICA_ALLOWED, read_replica
+from api.routes.utils.queryutil import GetListParams, build_list_query
+
+
+EXPORT_CHUNK_SIZE = 500
+
+
+class ExportFormat(str, Enum):
+    csv = 'csv'
+    ndjson = 'ndjson'
+
+
+MEDIA_TYPES = {
+    ExportFormat.csv: 'text/csv; charset=utf-8',
+    ExportFormat.ndjson: 'application/x-ndjson',
+}
+
+
+def csv_value(value):
+    if isinstance(value, dict | list):
+        return json.dumps(value)
+    return value
+
+
+def stream_export[T: SQLModel](
+    model_cls: type[T],
+    params: GetListParams,
+    schema: type[BaseModel],
+    format: ExportFormat,
+    transform: Callable[[SelectOfScalar[T]], SelectOfScalar[T]] | None = None,
+    serialize: Callable[[T], BaseModel] | None = None,
+) -> StreamingResponse:
+    """
+    Stream every row matching the `get_list` filters and ordering as CSV or NDJSON.
+
+    Rows are read through a server-side cursor in chunks of `EXPORT_CHUNK_SIZE` and written out
+    chunk by chunk, so memory stays constant regardless of the row count. The export runs in its
+    own session because the request session is closed before the response body is streamed.
+    `limit`/`offset` are honoured when given, otherwise all rows are exported. Chunks are serialized
+    in the threadpool, so a `serialize` that reads files does not block the event loop.
+    """
+    # Built before streaming starts so invalid params still produce a regular error response
+    q = build_list_query(model_cls, params, transform)
+    if params.offset is not None:
+        q = q.offset(params.offset)
+    if params.limit is not None:
+        q = q.limit(params.limit)
+    q = q.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+
+    serialize = serialize or (lambda row: schema(**row.model_dump()))
+    fields = list(schema.model_fields)
+
+    def write_chunk(rows: list[T]) -> str:
+        buffer = io.StringIO()
+        if format == ExportFormat.csv:
+            writer = csv.writer(buffer)
+            for row in rows:
+                data = serialize(row).model_dump(mode='json')
+                writer.writerow([csv_value(data.get(field)) for field in fields])
+        else:
+            for row in rows:
+                buffer.write(serialize(row).model_dump_json())
+                buffer.write('\n')
+        return buffer.getvalue()
+
+    async def generate():
+        if format == ExportFormat.csv:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(fields)
+            yield buffer.getvalue()
+
+        async with get_async_session() as session:
+            session.info[REPLICA_ALLOWED] = True
+            with read_replica(session):
+                result = await session.stream_scalars(q)
+                async for rows in result.partitions():
+                    chunk = await run_in_threadpool(write_chunk, list(rows))
+                    # Written rows are not needed anymore, keep the identity map from growing
+                    session.expunge_all()
+                    yield chunk
+
+    filename = f'{model_cls.__tablename__}.{format.value}'
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
@@ -1,38 +1,83 @@
 import base64
-from io import BytesIO
+import binascii
+import hashlib
+import os
+import tempfile
 from pathlib import Path
 
-from PIL import Image
+from api.settings import settings
 
 
-def save_base64_image(base64_str: str, file_path: str) -> str | None:
-    """
-    Convert and save a Base64 image string to a file.
-    Auto-detects image type and appends extension if missing.
+API_DIR = Path(__file__).resolve().parent.parent.parent
+PROFILE_DIR = API_DIR / settings.PROFILE_DIRECTORY
+INCOMING_DIR = PROFILE_DIR / 'incoming'
+
+# Leading bytes of the formats accepted as profile images
+IMAGE_SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'\xff\xd8\xff': 'jpeg',
+    b'GIF87a': 'gif',
+    b'GIF89a': 'gif',
+}
+
 
-    Args:
-        base64_str (str): Base64 encoded image string (with or without data:image/...;base64, prefix).
-        file_path (str): Path to save the decoded image (extension optional).
+def sniff_image_type(head: bytes) -> str | None:
+    """Detect the image format from its first bytes (at least 12), None when it is not an accepted image."""
+    for signature, format in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return format
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
 
-    Returns:
-        str: The path where the image was saved if successful.
-        None: If decoding fails or type can't be detected.
+
+def decode_base64_image(base64_str: str) -> bytes | None:
+    """
+    Decode a Base64 image string (with or without data:image/...;base64, prefix).
+    Returns None when it does not decode to an accepted image format.
     """
+    if ',' in base64_str:
+        base64_str = base64_str.split(',', 1)[1]
     try:
-        if "," in base64_str:
-            base64_str = base64_str.split(",", 1)[1]
-
-        image_data = base64.b64decode(base64_str)
-
-        image = Image.open(BytesIO(image_data))
-        assert image.format is not None, "Could not determine image format"
-        ext = image.format.lower()
-        
-        file_path = f"{file_path}.{ext}"
-        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
-        image.save(file_path)
-
-        return file_path
-    except Exception as e:
-        print(f"Failed to save image: {e}")
+        data = base64.b64decode(base64_str, validate=True)
+    except (binascii.Error, ValueError):
         return None
+    if sniff_image_type(data[:12]) is None:
+        return None
+    return data
+
+
+def profile_url(digest: str, size: int | None = None) -> str:
+    size = size or settings.PROFILE_IMAGE_DEFAULT_SIZE
+    return f'/static/{Path(settings.PROFILE_DIRECTORY).name}/{digest}_{size}.webp'
+
+
+def profile_variant_path(digest: str, size: int) -> Path:
+    return PROFILE_DIR / f'{digest}_{size}.webp'
+
+
+def is_processed(digest: str) -> bool:
+    return all(profile_variant_path(digest, size).exists() for size in settings.PROFILE_IMAGE_SIZES)
+
+
+def stage_file(path: Path, digest: str):
+    """Move a fully written upload into the incoming directory under its digest."""
+    target = INCOMING_DIR / digest
+    if target.exists() or is_processed(digest):
+        path.unlink(missing_ok=True)
+        return
+    os.replace(path, target)
+
+
+def stage_upload(data: bytes) -> str:
+    """
+    Store uploaded image bytes under their SHA-256 in the incoming directory for the image worker.
+    Returns the digest, which also names every processed variant.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=INCOMING_DIR, suffix='.part')
+    with os.fdopen(fd, 'wb') as file:
+        file.write(data)
+    stage_file(Path(tmp_path), digest)
+    return digest
@@ -0,0 +1,10 @@
+# Kept free of application imports: it is imported by the import pipeline's worker processes,
+# which are started with `spawn` and only need passlib.
+from passlib.context import CryptContext
+
+
+pwd_context = CryptContext(schemes=['argon2'], deprecated='auto')
+
+
+def hash_passwords(passwords: list[str | None]) -> list[str | None]:
+    return [pwd_context.hash(password) if password else None for password in passwords]
@@ -0,0 +1,226 @@
+import asyncio
+import codecs
+import csv
+import json
+import multiprocessing
+from collections.abc import AsyncIterable, AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+
+import pyotp
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from api.constants import ApplicationSettings, VerificationMethod
+from api.database.models.application_setting import ApplicationSetting
+from api.database.models.user import User
+from api.routes.utils.hashutil import hash_passwords
+from api.settings import settings
+
+
+IMPORT_CHUNK_SIZE = 500
+
+
+class ImportFormat(str, Enum):
+    csv = 'csv'
+    jsonl = 'jsonl'
+
+
+class ImportRowError(BaseModel):
+    row: int
+    email: str | None = None
+    error: str
+
+
+class ImportReport(BaseModel):
+    total: int = 0
+    inserted: int = 0
+    errors: list[ImportRowError] = []
+
+
+_hash_pool: ProcessPoolExecutor | None = None
+
+
+def get_hash_pool() -> ProcessPoolExecutor | None:
+    # `spawn` so the workers do not inherit the event loop, engines and open sockets of this process
+    global _hash_pool
+    if settings.IMPORT_HASH_WORKERS <= 0:
+        return None
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=settings.IMPORT_HASH_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _hash_pool
+
+
+async def hash_all(passwords: list[str | None]) -> list[str | None]:
+    """Hash `passwords` in the worker processes, split in one slice per worker."""
+    pool = get_hash_pool()
+    if pool is None:
+        return await run_in_threadpool(hash_passwords, passwords)
+
+    size = -(-len(passwords) // settings.IMPORT_HASH_WORKERS) or 1
+    slices = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    loop = asyncio.get_running_loop()
+    hashed = await asyncio.gather(*(loop.run_in_executor(pool, hash_passwords, part) for part in slices))
+    return [value for part in hashed for value in part]
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decode a UTF-8 byte stream into lines (with their line ending) without buffering it whole."""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+async def iter_records(
+    lines: AsyncIterable[str],
+    format: ImportFormat,
+) -> AsyncIterator[tuple[int, dict | str]]:
+    """
+    Yield `(row number, record)` pairs, or `(row number, error message)` for rows that cannot be parsed.
+    CSV input needs a header line; quoted fields may span lines. Empty CSV cells are left out so model
+    defaults apply.
+    """
+    row = 0
+    if format == ImportFormat.jsonl:
+        async for line in lines:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as ex:
+                yield row, f'Invalid JSON: {ex}'
+                continue
+            yield row, record if isinstance(record, dict) else 'Expected a JSON object'
+        return
+
+    header: list[str] | None = None
+    buffer = ''
+    async for line in lines:
+        buffer += line
+        # An odd number of quotes means a quoted field continues on the next line
+        if buffer.count('"') % 2:
+            continue
+        record, buffer = buffer, ''
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, f'Expected {len(header)} columns, got {len(values)}'
+            continue
+        yield row, {name: value for name, value in zip(header, values, strict=True) if value != ''}
+    if buffer.strip():
+        yield row + 1, 'Unterminated quoted field'
+
+
+async def insert_chunk(
+    db: AsyncSession,
+    chunk: list[tuple[int, BaseModel]],
+    verified: bool,
+    report: ImportReport,
+):
+    emails = [data.email for _, data in chunk]  # type: ignore
+    existing = set((await db.exec(select(User.email).where(User.email.in_(emails)))).all())  # type: ignore
+
+    seen = set()
+    accepted: list[tuple[int, BaseModel]] = []
+    for row, data in chunk:
+        email = data.email  # type: ignore
+        if email in existing:
+            report.errors.append(ImportRowError(row=row, email=email, error='Email already exists'))
+            continue
+        if email in seen:
+            report.errors.append(ImportRowError(row=row, email=email, error='Duplicate email in import'))
+            continue
+        seen.add(email)
+        accepted.append((row, data))
+    if not accepted:
+        return
+
+    hashed = await hash_all([data.password for _, data in accepted])  # type: ignore
+    values = []
+    for (_, data), password in zip(accepted, hashed, strict=True):
+        # Profiles are uploaded separately, base64 images are not accepted in bulk
+        user = User(**data.model_dump(exclude={'profile'}), tfa_secret=pyotp.random_base32())
+        user.password = password
+        if verified:
+            user.verified = True
+        values.append(user.model_dump(exclude={'id'}))
+
+    try:
+        await db.execute(insert(User), values)
+        await db.commit()
+    except Exception as ex:
+        await db.rollback()
+        # The driver error can quote other rows of the chunk, it is only logged
+        logger.warning(f'User import chunk starting at row {accepted[0][0]} failed: {ex!r}')
+        report.errors.extend(
+            ImportRowError(row=row, email=data.email, error='Could not insert the chunk of this row')  # type: ignore
+            for row, data in accepted
+        )
+        return
+    report.inserted += len(accepted)
+
+
+async def import_users(
+    db: AsyncSession,
+    records: AsyncIterable[tuple[int, dict | str]],
+    schema: type[BaseModel],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> ImportReport:
+    """
+    Validate `records` with `schema` (the `UserCreate` schema) and insert them in chunks of `chunk_size`.
+
+    Each chunk checks its emails against existing users with one query, hashes the passwords in the
+    hash worker processes and is inserted with a single executemany and committed on its own, so a
+    failing chunk does not undo the previous ones. Rows that fail are reported instead of aborting.
+    """
+    result = await db.exec(
+        select(ApplicationSetting)
+        .where(ApplicationSetting.name == ApplicationSettings.USER_VERIFICATION)
+    )
+    setting = result.first()
+    if not setting:
+        raise Exception('User verification setting not found. Perhaps you forgot to run migration?')
+    verified = setting.value == VerificationMethod.NONE
+
+    report = ImportReport()
+    chunk: list[tuple[int, BaseModel]] = []
+    async for row, record in records:
+        report.total += 1
+        if isinstance(record, str):
+            report.errors.append(ImportRowError(row=row, error=record))
+            continue
+        try:
+            data = schema(**record)
+        except ValidationError as ex:
+            error = '; '.join(f'{".".join(map(str, e["loc"]))}: {e["msg"]}' for e in ex.errors())
+            report.errors.append(ImportRowError(row=row, email=record.get('email'), error=error))
+            continue
+        chunk.append((row, data))
+        if len(chunk) >= chunk_size:
+            await insert_chunk(db, chunk, verified, report)
+            chunk = []
+    if chunk:
+        await insert_chunk(db, chunk, verified, report)
+
+    report.errors.sort(key=lambda error: error.row)
+    return report
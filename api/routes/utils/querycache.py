@@ -0,0 +1,228 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+
+from loguru import logger
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+from api.routes.utils.cacheutil import redis_client
+from api.routes.utils.singleflight import SingleFlight
+from api.settings import settings
+
+
+KEY_PREFIX = 'querycache:'
+
+
+class QueryCacheBackend:
+    """
+    Stores rows as plain dicts. Each `key` (model + id) holds one entry per query
+    fingerprint, so invalidating a row drops every variant cached for it.
+    """
+
+    async def get_many(self, keys: list[str], field: str) -> list[dict | None]:
+        raise NotImplementedError
+
+    async def set(self, key: str, field: str, value: dict, ttl: int):
+        raise NotImplementedError
+
+    async def delete(self, keys: list[str]):
+        raise NotImplementedError
+
+
+class MemoryBackend(QueryCacheBackend):
+    """
+    In-process LRU. Invalidation only reaches the current process, so with several API
+    processes keep the TTL short or use `RedisBackend`.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, tuple[float, dict[str, dict]]] = OrderedDict()
+
+    async def get_many(self, keys, field):
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < now:
+                self.entries.pop(key, None)
+                values.append(None)
+                continue
+            self.entries.move_to_end(key)
+            value = entry[1].get(field)
+            values.append(dict(value) if value is not None else None)
+        return values
+
+    async def set(self, key, field, value, ttl):
+        expires_at, fields = self.entries.get(key, (0.0, {}))
+        if expires_at < time.monotonic():
+            fields = {}
+        fields[field] = dict(value)
+        self.entries[key] = (time.monotonic() + ttl, fields)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def delete(self, keys):
+        for key in keys:
+            self.entries.pop(key, None)
+
+
+class RedisBackend(QueryCacheBackend):
+    async def get_many(self, keys, field):
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hget(key, field)
+        return [json.loads(value) if value is not None else None for value in await pipe.execute()]
+
+    async def set(self, key, field, value, ttl):
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hset(key, field, json.dumps(value, default=str))
+        pipe.expire(key, ttl)
+        await pipe.execute()
+
+    async def delete(self, keys):
+        if keys:
+            await redis_client.delete(*keys)
+
+
+@dataclass
+class CachePolicy:
+    backend: QueryCacheBackend
+    ttl: int
+
+
+registry: dict[type[SQLModel], CachePolicy] = {}
+flights = SingleFlight()
+
+
+def make_backend(name: str) -> QueryCacheBackend:
+    if name == 'memory':
+        return MemoryBackend(settings.QUERY_CACHE_MAX_ENTRIES)
+    if name == 'redis':
+        return RedisBackend()
+    raise ValueError(f'Unknown query cache backend `{name}`')
+
+
+def register(
+    model_cls: type[SQLModel],
+    backend: QueryCacheBackend | None = None,
+    ttl: int | None = None,
+):
+    """Opt `model_cls` into caching of `queryutil.get_one`/`get_many` lookups by id."""
+    registry[model_cls] = CachePolicy(
+        backend=backend or make_backend(settings.QUERY_CACHE_BACKEND),
+        ttl=settings.QUERY_CACHE_TTL if ttl is None else ttl,
+    )
+
+
+def cache_key(model_cls: type[SQLModel], id) -> str:
+    return f'{KEY_PREFIX}{model_cls.__tablename__}:{id}'
+
+
+def fingerprint(
+    model_cls: type[SQLModel],
+    transform: Callable[[SelectOfScalar], SelectOfScalar] | None,
+) -> str | None:
+    """
+    Identify what `transform` adds to the lookup (filters and their bound values).
+    Returns None when the result cannot be cached, e.g. the transform eager loads relationships.
+    """
+    if transform is None:
+        return '-'
+    q = transform(select(model_cls))
+    if q._with_options:
+        return None
+    compiled = q.compile()
+    params = sorted((k, repr(v)) for k, v in compiled.params.items())
+    return hashlib.sha1(f'{compiled}|{params}'.encode()).hexdigest()[:16]
+
+
+def is_cacheable(model_cls: type[SQLModel]) -> bool:
+    return settings.QUERY_CACHE_ENABLED and model_cls in registry
+
+
+async def invalidate(model_cls: type[SQLModel], ids: Sequence):
+    """Drop cached rows, called by the update/delete helpers after commit."""
+    if model_cls not in registry or not ids:
+        return
+    try:
+        await registry[model_cls].backend.delete([cache_key(model_cls, id) for id in ids])
+    except Exception as ex:
+        logger.warning(f'Failed to invalidate cached {model_cls.__name__} rows {list(ids)}: {ex}')
+
+
+async def attach[T: SQLModel](db: AsyncSession, model_cls: type[T], data: dict) -> T:
+    obj = model_cls.model_validate(data)
+    make_transient_to_detached(obj)
+    # load=False attaches the cached state to this session without a SELECT
+    return await db.merge(obj, load=False)
+
+
+async def fetch_many[T: SQLModel](
+    db: AsyncSession,
+    model_cls: type[T],
+    ids: Sequence,
+    transform: Callable[[SelectOfScalar[T]], SelectOfScalar[T]] | None,
+    query: Callable[[list], Awaitable[Sequence[T]]],
+) -> list[T] | None:
+    """
+    Read-through lookup of `ids`. Misses are loaded with `query(missing_ids)` in one call; identical
+    concurrent misses in this process share that call instead of running their own. `query` must
+    read from the primary: a lagging replica could hand back a row older than the last invalidation,
+    which would then be cached for the whole TTL.
+    Returns None when this lookup cannot be cached, the caller then queries as usual.
+    """
+    field = fingerprint(model_cls, transform)
+    if field is None:
+        return None
+
+    found: dict = {}
+    if transform is None:
+        # Rows already loaded in this session win, they may carry pending changes
+        identity_map = db.sync_session.identity_map
+        for id in ids:
+            if (obj := identity_map.get(identity_key(model_cls, id))) is not None:
+                found[id] = obj
+
+    policy = registry[model_cls]
+    keys = {id: cache_key(model_cls, id) for id in ids if id not in found}
+    try:
+        cached = await policy.backend.get_many(list(keys.values()), field) if keys else []
+    except Exception as ex:
+        logger.warning(f'Query cache read failed for {model_cls.__name__}: {ex}')
+        return None
+
+    missing = []
+    for id, data in zip(keys, cached, strict=True):
+        if data is not None:
+            found[id] = await attach(db, model_cls, data)
+        else:
+            missing.append(id)
+
+    if missing:
+        async def load() -> dict:
+            rows = await query(missing)
+            loaded = {row.id: row.model_dump() for row in rows}  # type: ignore
+            for id, data in loaded.items():
+                try:
+                    await policy.backend.set(keys[id], field, data, policy.ttl)
+                except Exception as ex:
+                    logger.warning(f'Query cache write failed for {model_cls.__name__}: {ex}')
+            return loaded
+
+        flight_key = (model_cls.__tablename__, field, tuple(missing))
+        loaded = await flights.do(flight_key, load)
+        for id in missing:
+            if id in loaded:
+                # For the caller that ran the query this returns its already loaded instance
+                found[id] = await attach(db, model_cls, loaded[id])
+
+    return [found[id] for id in ids if id in found]
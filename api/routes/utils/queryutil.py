@@ -1,6 +1,7 @@
 import json
 from collections.abc import Callable
 from enum import Enum
+from functools import partial
 from typing import Any, TypeVar
 
 from fastapi import HTTPException, Query, status
@@ -10,6 +11,9 @@ from sqlmodel import SQLModel, asc, desc, func, inspect, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.sql.expression import SelectOfScalar
 
+from api.database import read_and_release
+from api.routes.utils import querycache
+
 
 T = TypeVar('T', bound=SQLModel)
 Q = TypeVar('Q')
@@ -105,7 +109,6 @@ async def create_one[T: SQLModel](db: AsyncSession, data: T): # type: ignore
 
     db.add(data)
     await db.commit()
-    await db.refresh(data)
     return data
 
 
@@ -131,8 +134,6 @@ async def create_many[T: SQLModel](db: AsyncSession, data: list[T]):
         
     db.add_all(data)
     await db.commit()
-    for obj in data:
-        await db.refresh(obj)
     return data
 
 
@@ -142,13 +143,35 @@ async def get_one[T: SQLModel](
     id: int,
     transform: Callable[[SelectOfScalar[T]], SelectOfScalar[T]] | None = None,
 ):
-    q = select(model_cls).where(model_cls.id == id) # type: ignore
+    if querycache.is_cacheable(model_cls):
+        query = partial(select_by_ids, db, model_cls, transform=transform, replica=False)
+        cached = await querycache.fetch_many(db, model_cls, [id], transform, query)
+        if cached is not None:
+            if cached:
+                return cached[0]
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f'{model_cls.__name__} not found'
+            )
 
-    if transform is not None:
-        q = transform(q)
+    if transform is None:
+        # Served from the session identity map when the row was already loaded in this request
+        async with read_and_release(db):
+            obj = await db.get(model_cls, id)
+        if obj:
+            return obj
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'{model_cls.__name__} not found'
+        )
 
-    result = await db.exec(q)
-    if obj := result.first():
+    q = select(model_cls).where(model_cls.id == id) # type: ignore
+    q = transform(q)
+
+    async with read_and_release(db):
+        result = await db.exec(q)
+        obj = result.first()
+    if obj:
         return obj
     
     raise HTTPException(
@@ -162,6 +185,22 @@ async def get_many[T: SQLModel](
     model_cls: type[T],
     ids: list[int],
     transform: Callable[[SelectOfScalar[T]], SelectOfScalar[T]] | None = None,
+):
+    if querycache.is_cacheable(model_cls):
+        query = partial(select_by_ids, db, model_cls, transform=transform, replica=False)
+        cached = await querycache.fetch_many(db, model_cls, ids, transform, query)
+        if cached is not None:
+            return cached
+
+    return await select_by_ids(db, model_cls, ids, transform=transform)
+
+
+async def select_by_ids[T: SQLModel](
+    db: AsyncSession,
+    model_cls: type[T],
+    ids: list[int],
+    transform: Callable[[SelectOfScalar[T]], SelectOfScalar[T]] | None = None,
+    replica: bool = True,
 ):
     q = (
         select(model_cls)
@@ -171,16 +210,17 @@ async def get_many[T: SQLModel](
     if transform is not None:
         q = transform(q)
 
-    result = await db.exec(q)
-    return result.all()
+    async with read_and_release(db, replica=replica):
+        result = await db.exec(q)
+        return result.all()
 
 
-async def get_list[T: SQLModel](
-    db: AsyncSession,
+def build_list_query[T: SQLModel](
     model_cls: type[T],
     params: GetListParams,
     transform: Callable[[SelectOfScalar[T]], SelectOfScalar[T]] | None = None,
-):
+) -> SelectOfScalar[T]:
+    """Apply embeds, `transform`, filters and ordering of `params`, without pagination."""
     q = select(model_cls)
     
     mapper = inspect(model_cls)
@@ -235,18 +275,29 @@ async def get_list[T: SQLModel](
         else:
             q = q.order_by(desc(getattr(model_cls, params.order_field)))
 
-    cq = select(func.count()).select_from(q.subquery())
-    cq_result = await db.exec(cq)
-    total = cq_result.first() or 0
+    return q
+
+
+async def get_list[T: SQLModel](
+    db: AsyncSession,
+    model_cls: type[T],
+    params: GetListParams,
+    transform: Callable[[SelectOfScalar[T]], SelectOfScalar[T]] | None = None,
+):
+    q = build_list_query(model_cls, params, transform)
 
+    cq = select(func.count()).select_from(q.subquery())
     if params.offset is not None:
         q = q.offset(params.offset)
 
     if params.limit is not None:
         q = q.limit(params.limit)
 
-    q_result = await db.exec(q)
-    result = q_result.all()
+    async with read_and_release(db):
+        cq_result = await db.exec(cq)
+        total = cq_result.first() or 0
+        q_result = await db.exec(q)
+        result = q_result.all()
     return total, result
 
 
@@ -296,7 +347,7 @@ async def update_one(
 
     db.add(obj)
     await db.commit()
-    await db.refresh(obj)
+    await querycache.invalidate(model_cls, [id])
     return obj
 
 
@@ -351,8 +402,7 @@ async def update_many(
 
     db.add_all(updated_objs)
     await db.commit()
-    for obj in updated_objs:
-        await db.refresh(obj)
+    await querycache.invalidate(model_cls, ids)
     return updated_objs
 
 
@@ -376,6 +426,7 @@ async def delete_one[T: SQLModel](
         )
     await db.delete(obj)
     await db.commit()
+    await querycache.invalidate(model_cls, [id])
 
 
 async def delete_many[T: SQLModel](
@@ -399,3 +450,4 @@ async def delete_many[T: SQLModel](
             )
         await db.delete(obj)
     await db.commit()
+    await querycache.invalidate(model_cls, ids)
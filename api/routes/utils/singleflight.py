@@ -0,0 +1,47 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+from fastapi import Request
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight async computations: while a call for `key` is running,
+    further calls with the same key await its result instead of running `fn` again.
+
+    The result (or exception) is shared by every caller, so `fn` must not return objects
+    tied to the first caller, e.g. ORM instances of its session; return plain data instead.
+    Cancelling the caller that started the computation cancels it, the remaining callers
+    then start over with their own `fn`.
+    """
+
+    def __init__(self):
+        self.calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do[R](self, key: Hashable, fn: Callable[[], Awaitable[R]]) -> R:
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self.calls[key] = task
+            task.add_done_callback(lambda done: self.forget(key, done))
+            return await task
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if task.cancelled() and current is not None and not current.cancelling():
+                return await self.do(key, fn)
+            raise
+
+    def forget(self, key: Hashable, task: asyncio.Task):
+        if self.calls.get(key) is task:
+            del self.calls[key]
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+
+def request_key(request: Request) -> tuple:
+    """Normalized identity of a GET request: path plus sorted query parameters."""
+    return (request.method, request.url.path, tuple(sorted(request.query_params.multi_items())))
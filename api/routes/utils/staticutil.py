@@ -0,0 +1,136 @@
+import gzip
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from api.settings import settings
+
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip variants are generated without it
+    brotli = None
+
+
+# Served in order of preference when the client accepts the encoding
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE_SUFFIXES = {'.css', '.html', '.ico', '.js', '.json', '.map', '.svg', '.txt', '.xml'}
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def accepts_encoding(headers: Headers, encoding: str) -> bool:
+    for item in headers.get('accept-encoding', '').split(','):
+        name, _, params = item.strip().partition(';')
+        if name.strip().lower() == encoding:
+            return params.replace(' ', '') != 'q=0'
+    return False
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with cache headers and precompressed variants.
+
+    Files whose name matches `STATIC_IMMUTABLE_PATTERN` (content-addressed, e.g. the profile image
+    variants) are sent with a one year immutable Cache-Control, everything else with
+    `STATIC_CACHE_MAX_AGE` and revalidation through the ETag. When `<file>.br` or `<file>.gz`
+    exists, is not older than the file and the client accepts that encoding, the variant is sent
+    instead; range requests always get the identity file. Paths under `hidden` (e.g. staged uploads)
+    are never served.
+
+    Range requests and zero-copy `http.response.pathsend` (granian) are handled by FileResponse.
+    """
+
+    def __init__(self, *args, hidden: tuple[str, ...] = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hidden = tuple(prefix.strip('/') + '/' for prefix in hidden)
+        self.immutable_pattern = re.compile(settings.STATIC_IMMUTABLE_PATTERN)
+
+    def get_path(self, scope: Scope) -> str:
+        path = super().get_path(scope)
+        if path.replace(os.sep, '/').startswith(self.hidden):
+            raise HTTPException(status_code=404)
+        return path
+
+    def cache_control(self, path: str) -> str:
+        if self.immutable_pattern.search(path.replace(os.sep, '/')):
+            return IMMUTABLE_CACHE_CONTROL
+        return f'public, max-age={settings.STATIC_CACHE_MAX_AGE}, must-revalidate'
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        path, encoding = str(full_path), None
+        compressible = Path(path).suffix.lower() in COMPRESSIBLE_SUFFIXES
+        if compressible and 'range' not in request_headers:
+            for name, suffix in PRECOMPRESSED:
+                if not accepts_encoding(request_headers, name):
+                    continue
+                try:
+                    variant_stat = os.stat(path + suffix)
+                except OSError:
+                    continue
+                if variant_stat.st_mtime >= stat_result.st_mtime:
+                    path, stat_result, encoding = path + suffix, variant_stat, name
+                    break
+
+        media_type = mimetypes.guess_type(str(full_path))[0] or 'text/plain'
+        response = FileResponse(path, status_code=status_code, stat_result=stat_result, media_type=media_type)
+        response.headers['cache-control'] = self.cache_control(str(full_path))
+        if compressible:
+            response.headers['vary'] = 'Accept-Encoding'
+        if encoding:
+            response.headers['content-encoding'] = encoding
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress(directory: Path, min_size: int = 1024, hidden: tuple[str, ...] = ()) -> int:
+    """
+    Write `.gz` (and `.br` when brotli is installed) next to every compressible file of `directory`
+    that is missing or older than the file. Variants that do not save space are skipped.
+    Returns the number of variants written.
+    """
+    written = 0
+    for path in directory.rglob('*'):
+        relative = path.relative_to(directory).as_posix()
+        if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+            continue
+        if relative.startswith(tuple(prefix.strip('/') + '/' for prefix in hidden)):
+            continue
+        stat = path.stat()
+        if stat.st_size < min_size:
+            continue
+
+        data = None
+        for _, suffix in PRECOMPRESSED:
+            if suffix == '.br' and brotli is None:
+                continue
+            target = path.with_name(path.name + suffix)
+            if target.exists() and target.stat().st_mtime >= stat.st_mtime:
+                continue
+            data = data if data is not None else path.read_bytes()
+            if suffix == '.br':
+                compressed = brotli.compress(data, quality=11) # type: ignore
+            else:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) >= len(data):
+                continue
+            tmp_path = target.with_name(target.name + '.part')
+            tmp_path.write_bytes(compressed)
+            os.replace(tmp_path, target)
+            written += 1
+    return written
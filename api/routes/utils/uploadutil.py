@@ -0,0 +1,157 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import HTTPException, Request, status
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+from api.routes.utils.fileutil import INCOMING_DIR, sniff_image_type, stage_file
+
+
+SNIFF_BYTES = 12
+
+
+class ImageUpload:
+    """
+    Receives one file field of a multipart body as it streams in: the bytes go to a temp file
+    next to the staged uploads while the SHA-256 is computed, the format is checked from the
+    first bytes and the upload is aborted as soon as it exceeds `max_bytes`.
+    """
+
+    def __init__(self, field_name: str, max_bytes: int):
+        self.field_name = field_name
+        self.max_bytes = max_bytes
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+        self.file = None
+        self.tmp_path: Path | None = None
+        self.found = False
+
+        # parser callback state, applied after every `write` since the callbacks are sync
+        self.header_field = b''
+        self.header_value = b''
+        self.headers: dict[bytes, bytes] = {}
+        self.in_field = False
+        self.chunks: list[bytes] = []
+
+    def callbacks(self) -> dict:
+        def on_part_begin():
+            self.headers = {}
+
+        def on_header_field(data: bytes, start: int, end: int):
+            self.header_field += data[start:end]
+
+        def on_header_value(data: bytes, start: int, end: int):
+            self.header_value += data[start:end]
+
+        def on_header_end():
+            self.headers[self.header_field.lower()] = self.header_value
+            self.header_field = b''
+            self.header_value = b''
+
+        def on_headers_finished():
+            _, options = parse_options_header(self.headers.get(b'content-disposition', b''))
+            # only the first file sent under `field_name` is kept
+            self.in_field = (
+                not self.found
+                and options.get(b'name') == self.field_name.encode()
+                and b'filename' in options
+            )
+            self.found = self.found or self.in_field
+
+        def on_part_data(data: bytes, start: int, end: int):
+            if self.in_field:
+                self.chunks.append(data[start:end])
+
+        def on_part_end():
+            self.in_field = False
+
+        return {
+            'on_part_begin': on_part_begin,
+            'on_header_field': on_header_field,
+            'on_header_value': on_header_value,
+            'on_header_end': on_header_end,
+            'on_headers_finished': on_headers_finished,
+            'on_part_data': on_part_data,
+            'on_part_end': on_part_end,
+        }
+
+    async def consume(self):
+        chunks, self.chunks = self.chunks, []
+        for chunk in chunks:
+            self.size += len(chunk)
+            if self.size > self.max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f'File exceeds {self.max_bytes} bytes',
+                )
+            if len(self.head) < SNIFF_BYTES:
+                self.head += chunk[:SNIFF_BYTES - len(self.head)]
+                if len(self.head) >= SNIFF_BYTES and sniff_image_type(self.head) is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail='Unsupported image format',
+                    )
+            self.sha256.update(chunk)
+            await run_in_threadpool(self.file.write, chunk) # type: ignore
+
+    async def receive(self, request: Request) -> str:
+        """Stream the request body and stage the file, returns its SHA-256 digest."""
+        content_type, options = parse_options_header(request.headers.get('content-type', ''))
+        if content_type != b'multipart/form-data' or b'boundary' not in options:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail='Expected a multipart/form-data body',
+            )
+        # The multipart overhead is small, reject clearly oversized bodies before reading them
+        content_length = int(request.headers.get('content-length') or 0)
+        if content_length > self.max_bytes + 64 * 1024:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f'File exceeds {self.max_bytes} bytes',
+            )
+
+        INCOMING_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=INCOMING_DIR, suffix='.part')
+        self.file = os.fdopen(fd, 'wb')
+        self.tmp_path = Path(tmp_path)
+        try:
+            parser = MultipartParser(options[b'boundary'], self.callbacks())
+            try:
+                async for chunk in request.stream():
+                    parser.write(chunk)
+                    await self.consume()
+                parser.finalize()
+            except MultipartParseError as ex:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f'Invalid multipart body: {ex}',
+                ) from ex
+            await self.consume()
+            self.file.close()
+
+            if not self.found or self.size == 0:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f'Missing file field `{self.field_name}`',
+                )
+            if sniff_image_type(self.head) is None:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail='Unsupported image format',
+                )
+            digest = self.sha256.hexdigest()
+            await run_in_threadpool(stage_file, self.tmp_path, digest)
+            return digest
+        finally:
+            self.file.close()
+            # already moved away when staged
+            self.tmp_path.unlink(missing_ok=True)
+
+
+async def receive_image_upload(request: Request, field_name: str, max_bytes: int) -> str:
+    return await ImageUpload(field_name, max_bytes).receive(request)
@@ -0,0 +1,16 @@
+import os
+
+
+os.environ.setdefault('DB_POOL_PROFILE', 'scripts')
+
+from api.main import app  # noqa: E402
+from api.openapi import write_artifact  # noqa: E402
+
+
+def main():
+    path = write_artifact(app)
+    print(f'✅  OpenAPI schema written to {path}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@
 # dependencies = [
 #     "aiomysql",
 #     "argon2-cffi",
+#     "loguru",
 #     "passlib",
 #     "pydantic-settings",
 #     "pymysql",
@@ -10,13 +11,17 @@
 #     "sqlmodel",
 # ]
 # ///
+import os
 import re
 from getpass import getpass
 
 from passlib.context import CryptContext
 
-from api.database import get_sync_session
-from api.database.models.user import User
+
+os.environ.setdefault('DB_POOL_PROFILE', 'scripts')
+
+from api.database import get_sync_session  # noqa: E402
+from api.database.models.user import User  # noqa: E402
 
 
 pwd_context = CryptContext(schemes=['argon2'], deprecated='auto')
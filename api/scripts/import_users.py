@@ -0,0 +1,62 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "aiomysql",
+#     "argon2-cffi",
+#     "fastapi",
+#     "loguru",
+#     "passlib",
+#     "pydantic-settings",
+#     "pymysql",
+#     "pyotp",
+#     "redis",
+#     "sqlmodel",
+# ]
+# ///
+import argparse
+import asyncio
+import os
+from pathlib import Path
+
+
+os.environ.setdefault('DB_POOL_PROFILE', 'scripts')
+
+from api.database import get_async_session  # noqa: E402
+from api.routes.user import UserCreate  # noqa: E402
+from api.routes.utils import importutil  # noqa: E402
+from api.routes.utils.importutil import ImportFormat  # noqa: E402
+
+
+READ_SIZE = 64 * 1024
+
+
+async def read_chunks(path: Path):
+    with path.open('rb') as file:
+        while chunk := file.read(READ_SIZE):
+            yield chunk
+
+
+async def run(path: Path, format: ImportFormat, chunk_size: int):
+    lines = importutil.iter_lines(read_chunks(path))
+    records = importutil.iter_records(lines, format)
+    async with get_async_session() as session:
+        report = await importutil.import_users(session, records, UserCreate, chunk_size)
+
+    for error in report.errors:
+        print(f'❌  Row {error.row} ({error.email or "-"}): {error.error}')
+    print(f'✅  Imported {report.inserted} of {report.total} users.')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import users from a CSV or JSON lines file.')
+    parser.add_argument('file', type=Path)
+    parser.add_argument('--format', choices=[f.value for f in ImportFormat], help='defaults to the file extension')
+    parser.add_argument('--chunk-size', type=int, default=importutil.IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    format = ImportFormat(args.format or args.file.suffix.lstrip('.').lower())
+    asyncio.run(run(args.file, format, args.chunk_size))
+
+
+if __name__ == '__main__':
+    main()
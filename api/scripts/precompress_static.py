@@ -0,0 +1,31 @@
+# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#     "brotli",
+#     "pydantic-settings",
+#     "starlette",
+# ]
+# ///
+import argparse
+from pathlib import Path
+
+from api.routes.utils.staticutil import brotli, precompress
+
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / 'static'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write .gz/.br variants of the compressible static files.')
+    parser.add_argument('directory', type=Path, nargs='?', default=STATIC_DIR)
+    parser.add_argument('--min-size', type=int, default=1024, help='skip files smaller than this many bytes')
+    args = parser.parse_args()
+
+    if brotli is None:
+        print('⚠️  brotli is not installed, only gzip variants are written.')
+    written = precompress(args.directory, args.min_size, hidden=('profiles/incoming',))
+    print(f'✅  Wrote {written} precompressed files in {args.directory}.')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,16 @@
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
 
+class PoolProfile(BaseModel):
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    pool_use_lifo: bool = False
+
+
 class Settings(BaseSettings):
     APP_NAME: str
     SECRET_KEY: str = 'change-me'
@@ -16,6 +26,18 @@ class Settings(BaseSettings):
     MYSQL_DATABASE: str
     DATABASE_URL: str
     DATABASE_URL_ASYNC: str
+    DATABASE_REPLICA_URLS_ASYNC: list[str] = [] # read replicas for GET requests, empty disables routing
+    DB_REPLICA_MAX_LAG_S: float = 5 # replicas further behind are skipped until they catch up
+    DB_REPLICA_CHECK_INTERVAL_S: float = 5
+    DB_POOL_PROFILE: str = 'api' # api | worker | scripts
+    DB_POOL_PROFILES: dict[str, PoolProfile] = {
+        # LIFO lets idle connections above the steady load age out through pool_recycle
+        'api': PoolProfile(pool_size=10, max_overflow=20, pool_timeout=30, pool_use_lifo=True),
+        # every RQ work horse is a separate process running one job at a time
+        'worker': PoolProfile(pool_size=2, max_overflow=2, pool_timeout=30),
+        'scripts': PoolProfile(pool_size=1, max_overflow=0, pool_timeout=60),
+    }
+    DB_POOL_SLOW_CHECKOUT_MS: float = 500 # log checkout waits above this with the current holders, 0 disables
 
     REDIS_HOST: str
     REDIS_PORT: int = 6379
@@ -23,8 +45,80 @@ class Settings(BaseSettings):
     REDIS_EMAIL_CHANNEL: str = 'emails'
 
     PROFILE_DIRECTORY: str = 'static/profiles'
+    PROFILE_IMAGE_SIZES: list[int] = [512, 256, 64] # square WebP variants made by the image worker
+    PROFILE_IMAGE_DEFAULT_SIZE: int = 256 # variant stored as the user's profile url
+    PROFILE_IMAGE_QUALITY: int = 82
+    PROFILE_IMAGE_MAX_BYTES: int = 10 * 1024 * 1024
+    PROFILE_IMAGE_MAX_PIXELS: int = 40_000_000 # larger images are rejected as decompression bombs
+
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024 # bytes, smaller responses are sent as is
+    COMPRESSION_TYPES: list[str] = [ # content type prefixes worth compressing
+        'application/json', 'application/x-ndjson', 'application/javascript', 'image/svg+xml', 'text/',
+    ]
+    COMPRESSION_LEVELS: dict[str, int] = {} # per encoding overrides, e.g. {"gzip": 9}
+    COMPRESSION_CACHE_PATHS: list[str] = ['/openapi.json'] # compressed once per distinct body
+
+    STATIC_CACHE_MAX_AGE: int = 3600 # seconds for static files that are not content-addressed
+    STATIC_IMMUTABLE_PATTERN: str = r'(^|/)([0-9a-f]{64}_\d+|[^/]+\.[0-9a-f]{8,})\.\w+$' # content-addressed names
+
+    LOG_LEVEL: str = 'INFO'
+    LOG_FORMAT: str = 'text' # text | json
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_DROP_POLICY: str = 'drop_newest' # drop_newest | drop_oldest
+    LOG_SAMPLING: dict[str, float] = {} # per level keep ratio, e.g. {"DEBUG": 0.1}
+
+    TRACE_SAMPLE_RATIO: float = 1.0
+    TRACE_PARENT_BASED: bool = True
+    TRACE_TAIL_ENABLED: bool = False
+    TRACE_TAIL_SLOW_MS: float = 1000
+    TRACE_TAIL_KEEP_ERRORS: bool = True
+    TRACE_TAIL_BASELINE_RATIO: float = 0.0 # share of fast, successful traces still kept
+    TRACE_TAIL_MAX_TRACES: int = 2048
+    TRACE_BATCH_MAX_QUEUE_SIZE: int = 2048
+    TRACE_BATCH_MAX_EXPORT_SIZE: int = 512
+    TRACE_BATCH_SCHEDULE_DELAY_MS: int = 5000
+    TRACE_BATCH_EXPORT_TIMEOUT_MS: int = 30000
+    TRACE_SQL_EXCLUDE: list[str] = [] # regexes of statements that never get a span
+
+    QUERY_BUDGET: int = 0 # max statements per request, 0 disables the check
+    QUERY_REPEAT_THRESHOLD: int = 5 # identical statement shapes per request flagged as N+1
+
+    RESPONSE_CACHE_ENABLED: bool = True # ETag / If-None-Match handling on cacheable GET endpoints
+    RESPONSE_CACHE_TTL: int = 0 # seconds serialized bodies are kept in Redis, 0 disables body caching
+    RESPONSE_CACHE_VERSION_TTL: int = 3600 # bounds how long writes made outside the routes go unnoticed
+
+    QUERY_CACHE_ENABLED: bool = True # read-through cache of get_one/get_many for registered models
+    QUERY_CACHE_BACKEND: str = 'redis' # redis | memory (per process LRU, invalidated locally only)
+    QUERY_CACHE_TTL: int = 300
+    QUERY_CACHE_MAX_ENTRIES: int = 1024 # memory backend only
+
+    IMPORT_HASH_WORKERS: int = 2 # processes hashing passwords for bulk user imports, 0 hashes in a thread
+
+    NOTIFICATION_RETENTION_CRON: str = '*/10 * * * *' # retention days/mode are application settings
+    NOTIFICATION_RETENTION_BATCH_SIZE: int = 1000 # ids per transaction
+    NOTIFICATION_RETENTION_BATCH_PAUSE_S: float = 0.1 # gives replication and other writers room between batches
+    NOTIFICATION_RETENTION_MAX_BATCHES: int = 200 # per run, the next run resumes from the checkpoint
+    NOTIFICATION_RETENTION_LOCK_TTL_S: int = 600
+    NOTIFICATION_SEE_ALL_CHUNK_SIZE: int = 500 # rows per transaction when marking all notifications as seen
+    USER_PURGE_CRON: str = '0 * * * *' # sweeps deleted users whose cleanup job was lost
+    USER_PURGE_BATCH_SIZE: int = 1000 # notifications per transaction
+    USER_PURGE_BATCH_PAUSE_S: float = 0.1
+    USER_PURGE_LOCK_TTL_S: int = 600
+    NOTIFICATION_PARTITIONS_CRON: str = '0 3 * * *'
+    NOTIFICATION_PARTITIONS_AHEAD: int = 3 # months with a partition ready before rows arrive
+
+    OPENAPI_ARTIFACT: bool = True # serve the schema from a versioned artifact, disable while developing routes
+
+    METRICS_TOKEN: str = '' # bearer token required by /metrics, empty leaves it open
 
     GOOGLE_OAUTH_CLIENT_ID: str = ''
     GOOGLE_OAUTH_CLIENT_SECRET: str = ''
 
+    @property
+    def pool_profile(self) -> PoolProfile:
+        if self.DB_POOL_PROFILE not in self.DB_POOL_PROFILES:
+            raise ValueError(f'Unknown DB_POOL_PROFILE `{self.DB_POOL_PROFILE}`')
+        return self.DB_POOL_PROFILES[self.DB_POOL_PROFILE]
+
 settings = Settings() # type: ignore
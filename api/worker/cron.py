@@ -1,5 +1,10 @@
 from rq import cron
 
+from api.settings import settings
+from api.worker.tasks.partition import maintain_notification_partitions
+from api.worker.tasks.retention import purge_notifications
+from api.worker.tasks.user import purge_deleted_users
+
 
 # Register cron jobs here
 # from api.worker.tasks.email import send_email
@@ -11,3 +16,21 @@ from rq import cron
 #     kwargs={},
 #     interval=5
 # )
+
+cron.register(
+    purge_notifications,
+    queue_name='scheduled',
+    cron=settings.NOTIFICATION_RETENTION_CRON,
+)
+
+cron.register(
+    maintain_notification_partitions,
+    queue_name='scheduled',
+    cron=settings.NOTIFICATION_PARTITIONS_CRON,
+)
+
+cron.register(
+    purge_deleted_users,
+    queue_name='scheduled',
+    cron=settings.USER_PURGE_CRON,
+)
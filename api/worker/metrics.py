@@ -0,0 +1,53 @@
+import time
+
+from rq import Queue, Worker
+from rq.job import Job
+
+from api.metrics import REGISTRY, CallbackGauge, SharedHistogram, get_metrics_redis
+
+
+QUEUE_NAMES = ('notification', 'email', 'image', 'scheduled')
+
+JOB_DURATION = REGISTRY.register(SharedHistogram(
+    'rq_job_duration_seconds', 'RQ job execution time, recorded by the work horse', ('queue', 'func', 'status'),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+))
+
+
+def queue_samples():
+    connection = get_metrics_redis()
+    for name in QUEUE_NAMES:
+        queue = Queue(name, connection=connection)
+        yield {'queue': name, 'state': 'queued'}, queue.count
+        yield {'queue': name, 'state': 'started'}, queue.started_job_registry.count
+        yield {'queue': name, 'state': 'scheduled'}, queue.scheduled_job_registry.count
+        yield {'queue': name, 'state': 'failed'}, queue.failed_job_registry.count
+
+
+REGISTRY.register(CallbackGauge('rq_queue_jobs', 'RQ jobs per queue and state', queue_samples))
+
+
+class MetricsWorker(Worker):
+    """
+    Worker that records every job's duration into the shared Redis-backed registry,
+    so they are exposed by the API's `/metrics` endpoint.
+
+    Use with `rq worker-pool --worker-class api.worker.metrics.MetricsWorker`.
+    """
+
+    def perform_job(self, job: Job, queue: Queue) -> bool:
+        start = time.perf_counter()
+        success = False
+        try:
+            success = super().perform_job(job, queue)
+            return success
+        finally:
+            try:
+                JOB_DURATION.observe(
+                    time.perf_counter() - start,
+                    queue=queue.name,
+                    func=job.func_name,
+                    status='finished' if success else 'failed',
+                )
+            except Exception:
+                self.log.exception('Failed to record job metrics')
@@ -1,11 +1,11 @@
-from redis import Redis
 from rq import Queue
 
+from api.metrics import InstrumentedRedis
 from api.settings import settings
 
 
 def get_notification_queue():
-    with Redis(
+    with InstrumentedRedis(
         host=settings.REDIS_HOST,
         port=settings.REDIS_PORT,
         db=0
@@ -15,10 +15,20 @@ def get_notification_queue():
 
 
 def get_email_queue():
-    with Redis(
+    with InstrumentedRedis(
         host=settings.REDIS_HOST,
         port=settings.REDIS_PORT,
         db=0
     ) as redis:
         queue = Queue('email', connection=redis)
         yield queue
+
+
+def get_image_queue():
+    with InstrumentedRedis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=0
+    ) as redis:
+        queue = Queue('image', connection=redis)
+        yield queue
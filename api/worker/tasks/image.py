@@ -0,0 +1,65 @@
+def process_profile_image(digest: str, user_id: int | None = None):
+    """
+    Turn the staged upload `digest` into the WebP variants listed in `PROFILE_IMAGE_SIZES`.
+
+    The image is re-encoded from its pixels only, so EXIF (including GPS data), ICC profiles and
+    comments are dropped. Variants are named after the upload digest, so an image that was already
+    processed is skipped. Concurrent jobs for the same digest write their own temp files, and a job
+    whose staged file was already consumed by another one succeeds once the variants exist. When
+    processing fails the profile of `user_id` is cleared if it still points at the variants that
+    were never produced.
+    """
+    import os
+    import tempfile
+    from pathlib import Path
+
+    from loguru import logger
+    from PIL import Image, ImageOps
+    from sqlmodel import update
+
+    from api.database import get_sync_session
+    from api.database.models.user import User
+    from api.routes.utils.fileutil import INCOMING_DIR, is_processed, profile_url, profile_variant_path
+    from api.settings import settings
+
+
+    source = INCOMING_DIR / digest
+    try:
+        if is_processed(digest):
+            return
+
+        Image.MAX_IMAGE_PIXELS = settings.PROFILE_IMAGE_MAX_PIXELS
+        with Image.open(source) as image:
+            image.verify()
+        with Image.open(source) as image:
+            image.seek(0)  # first frame of animated images
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+
+            for size in sorted(settings.PROFILE_IMAGE_SIZES, reverse=True):
+                variant = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+                target = profile_variant_path(digest, size)
+                fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix='.part')
+                os.close(fd)
+                try:
+                    variant.save(tmp_path, 'WEBP', quality=settings.PROFILE_IMAGE_QUALITY, method=6)
+                    os.replace(tmp_path, target)
+                finally:
+                    Path(tmp_path).unlink(missing_ok=True)
+    except Exception as ex:
+        if is_processed(digest):
+            # Another job of the same upload produced the variants meanwhile
+            logger.info(f'Profile image {digest} was processed by another job')
+            return
+        logger.warning(f'Failed to process profile image {digest}: {ex}')
+        if user_id is not None:
+            with get_sync_session() as session:
+                session.exec(
+                    update(User)
+                    .where(User.id == user_id, User.profile == profile_url(digest)) # type: ignore
+                    .values(profile=None)
+                ) # type: ignore
+                session.commit()
+        raise
+    finally:
+        source.unlink(missing_ok=True)
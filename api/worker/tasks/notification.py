@@ -44,13 +44,16 @@ def notify_role(
     title: str,
     body: str
 ):
+    """
+    Notify every user of `roles` with one broadcast per role, per user seen state is only
+    written when a user marks it as seen.
+    """
     from constants import ApplicationSettings
-    from sqlmodel import insert, literal, select
+    from sqlmodel import select
 
     from api.database import get_sync_session
     from api.database.models.application_setting import ApplicationSetting
-    from api.database.models.notification import Notification
-    from api.database.models.user import User
+    from api.database.models.broadcast import Broadcast
 
 
     with get_sync_session() as session:
@@ -66,25 +69,14 @@ def notify_role(
         if notification_enabled != '1':
             return
 
-        subquery = select(User.id).where(User.role.in_(roles)) # type: ignore
-        statement = (
-            insert(Notification)
-            .from_select(
-                [
-                    Notification.user_id,
-                    Notification.triggered_by,
-                    Notification.category,
-                    Notification.title,
-                    Notification.body,
-                ], # type: ignore
-                select(
-                    subquery.c.id,
-                    triggered_by,
-                    literal(category),
-                    literal(title),
-                    literal(body),
-                ) # type: ignore
-            )
-        )
-        session.exec(statement) # type: ignore
+        session.add_all([
+            Broadcast(
+                role=role,
+                triggered_by=triggered_by,
+                category=category,
+                title=title,
+                body=body,
+            ) # type: ignore
+            for role in set(roles)
+        ])
         session.commit()
@@ -0,0 +1,20 @@
+def maintain_notification_partitions():
+    """Keep `NOTIFICATION_PARTITIONS_AHEAD` empty monthly partitions ready ahead of the current month."""
+    from datetime import date
+
+    from loguru import logger
+
+    from api.database import get_sync_session
+    from api.database.partition import add_months, ensure_monthly_partitions, month_start
+    from api.settings import settings
+
+
+    until = add_months(month_start(date.today()), settings.NOTIFICATION_PARTITIONS_AHEAD)
+    with get_sync_session() as session:
+        conn = session.connection()
+        if conn.dialect.name != 'mysql':
+            return
+        created = ensure_monthly_partitions(conn, 'notifications', until)
+        session.commit()
+    if created:
+        logger.info(f'Created notifications partitions {created}')
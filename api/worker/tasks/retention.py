@@ -0,0 +1,124 @@
+CHECKPOINT_KEY = 'retention:notifications:last_id'
+LOCK_KEY = 'retention:notifications:lock'
+
+
+def retention_policy(values: dict[str, str]):
+    """
+    Parse the retention days and mode out of the application setting `values`.
+    A value that can not be parsed is logged and turns retention off rather than failing the job.
+    """
+    from loguru import logger
+
+    from api.constants import ApplicationSettings, RetentionMode
+
+
+    raw_days = values.get(ApplicationSettings.NOTIFICATION_RETENTION_DAYS)
+    raw_mode = values.get(ApplicationSettings.NOTIFICATION_RETENTION_MODE)
+    try:
+        days = int(raw_days or 0)
+    except ValueError:
+        logger.warning(f'Invalid notification retention days {raw_days!r}, retention is off')
+        return 0, RetentionMode.OFF
+    try:
+        mode = RetentionMode(raw_mode or RetentionMode.OFF)
+    except ValueError:
+        logger.warning(f'Invalid notification retention mode {raw_mode!r}, retention is off')
+        return 0, RetentionMode.OFF
+    return days, mode
+
+
+def purge_notifications():
+    """
+    Archive (or delete) seen notifications older than the retention setting, in small batches.
+
+    Every batch covers the next `NOTIFICATION_RETENTION_BATCH_SIZE` ids above the checkpoint and is
+    committed on its own, so locks are only held on that primary key range. The last processed id
+    is checkpointed in Redis: a run stopped by `NOTIFICATION_RETENTION_MAX_BATCHES` (or a crash)
+    resumes there. Once a pass reaches the newest expired id the checkpoint is reset, so rows that
+    were seen after a pass went by are picked up by the next one.
+    """
+    import time
+    from datetime import datetime, timedelta
+
+    from loguru import logger
+    from sqlalchemy import delete, func, insert, select
+
+    from api.constants import ApplicationSettings, RetentionMode
+    from api.database import get_sync_session
+    from api.database.models.application_setting import ApplicationSetting
+    from api.database.models.notification import Notification
+    from api.database.models.notification_archive import NotificationArchive
+    from api.metrics import InstrumentedRedis
+    from api.settings import settings
+
+
+    redis = InstrumentedRedis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0)
+    lock_ttl = settings.NOTIFICATION_RETENTION_LOCK_TTL_S
+    if not redis.set(LOCK_KEY, '1', nx=True, ex=lock_ttl):
+        logger.info('Notification retention already running, skipping')
+        return
+
+    try:
+        with get_sync_session() as session:
+            values = dict(session.exec(
+                select(ApplicationSetting.name, ApplicationSetting.value)
+                .where(ApplicationSetting.name.in_([ # type: ignore
+                    ApplicationSettings.NOTIFICATION_RETENTION_DAYS,
+                    ApplicationSettings.NOTIFICATION_RETENTION_MODE,
+                ]))
+            ).all()) # type: ignore
+            days, mode = retention_policy(values)
+            if days <= 0 or mode == RetentionMode.OFF:
+                return
+
+            cutoff = datetime.now() - timedelta(days=days)
+            # Ids grow with created_at, nothing above the newest expired id can be expired
+            max_id = session.exec(
+                select(func.max(Notification.id)).where(Notification.created_at < cutoff) # type: ignore
+            ).one()[0]
+            if max_id is None:
+                return
+
+            last_id = int(redis.get(CHECKPOINT_KEY) or 0)
+            moved = 0
+            columns = ['id', 'user_id', 'triggered_by', 'title', 'body', 'category', 'seen', 'created_at', 'updated_at']
+            for _ in range(settings.NOTIFICATION_RETENTION_MAX_BATCHES):
+                if last_id >= max_id:
+                    break
+                # Upper bound of the next batch, found by walking the primary key only
+                upper = session.exec(
+                    select(Notification.id)
+                    .where(Notification.id > last_id, Notification.id <= max_id) # type: ignore
+                    .order_by(Notification.id) # type: ignore
+                    .offset(settings.NOTIFICATION_RETENTION_BATCH_SIZE - 1)
+                    .limit(1)
+                ).first()
+                upper = upper[0] if upper is not None else max_id
+
+                expired = (
+                    Notification.id > last_id, # type: ignore
+                    Notification.id <= upper, # type: ignore
+                    Notification.seen == True, # type: ignore # noqa: E712
+                    Notification.created_at < cutoff, # type: ignore
+                )
+                if mode == RetentionMode.ARCHIVE:
+                    source = select(*(getattr(Notification, column) for column in columns)).where(*expired)
+                    session.exec(
+                        insert(NotificationArchive).from_select(columns, source)
+                        .prefix_with('IGNORE', dialect='mysql') # rows archived by an interrupted batch
+                    ) # type: ignore
+                result = session.exec(delete(Notification).where(*expired)) # type: ignore
+                session.commit()
+
+                moved += result.rowcount
+                last_id = upper
+                redis.set(CHECKPOINT_KEY, last_id)
+                redis.expire(LOCK_KEY, lock_ttl)
+                time.sleep(settings.NOTIFICATION_RETENTION_BATCH_PAUSE_S)
+
+            if last_id >= max_id:
+                # Pass complete, start over from the oldest rows next time
+                redis.delete(CHECKPOINT_KEY)
+            logger.info(f'Notification retention ({mode.value}) removed {moved} rows, checkpoint at id {last_id}')
+    finally:
+        redis.delete(LOCK_KEY)
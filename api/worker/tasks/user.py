@@ -0,0 +1,98 @@
+LOCK_KEY = 'purge:users:lock'
+CACHE_VERSION_KEY_PREFIX = 'cache:version:' # `cacheutil.VERSION_KEY_PREFIX`, the API cache of the table
+
+
+def purge_deleted_users():
+    """
+    Remove what soft deleted users leave behind, then the users themselves.
+
+    Deleting a user only sets `deleted_at`. Its notifications (received, triggered and archived)
+    are deleted here `USER_PURGE_BATCH_SIZE` rows at a time, every batch committed on its own so
+    the notifications table is never locked for long, followed by its broadcast receipts.
+    `modified_by_id` references to the user are cleared before the user row is deleted, and a
+    user that still fails is logged and left for the next run. Enqueued after every deletion and
+    swept by a cron job in case a job was lost, a Redis lock keeps the runs from overlapping. The
+    lock holds a token of this run, so a run that lost it never releases the lock of the next one.
+    """
+    import time
+
+    from loguru import logger
+    from redis.exceptions import LockError
+    from sqlalchemy import delete, update
+    from sqlmodel import select
+
+    from api.database import get_sync_session
+    from api.database.models.application_setting import ApplicationSetting
+    from api.database.models.broadcast import BroadcastReceipt
+    from api.database.models.notification import Notification
+    from api.database.models.notification_archive import NotificationArchive
+    from api.database.models.role_access_control import RoleAccessControl
+    from api.database.models.template import Template
+    from api.database.models.user import User
+    from api.metrics import InstrumentedRedis
+    from api.settings import settings
+
+
+    redis = InstrumentedRedis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0)
+    lock = redis.lock(LOCK_KEY, timeout=settings.USER_PURGE_LOCK_TTL_S)
+    if not lock.acquire(blocking=False):
+        logger.info('User purge already running, skipping')
+        return
+
+    batch_size = settings.USER_PURGE_BATCH_SIZE
+    try:
+        with get_sync_session() as session:
+            user_ids = session.exec(
+                select(User.id).where(User.deleted_at != None) # type: ignore # noqa: E711
+            ).all()
+
+            for user_id in user_ids:
+                removed = 0
+                try:
+                    for model_cls, column in (
+                        (Notification, Notification.user_id),
+                        (Notification, Notification.triggered_by),
+                        (NotificationArchive, NotificationArchive.user_id),
+                    ):
+                        while True:
+                            ids = session.exec(
+                                select(model_cls.id).where(column == user_id).limit(batch_size) # type: ignore
+                            ).all()
+                            if not ids:
+                                break
+                            session.exec(delete(model_cls).where(model_cls.id.in_(ids))) # type: ignore
+                            session.commit()
+                            removed += len(ids)
+                            # Raises once the lock expired and may be held by another run
+                            lock.reacquire()
+                            time.sleep(settings.USER_PURGE_BATCH_PAUSE_S)
+
+                    modified = []
+                    for model_cls in (ApplicationSetting, RoleAccessControl, Template):
+                        result = session.exec(
+                            update(model_cls)
+                            .where(model_cls.modified_by_id == user_id) # type: ignore
+                            .values(modified_by_id=None)
+                        ) # type: ignore
+                        if result.rowcount:
+                            modified.append(f'{CACHE_VERSION_KEY_PREFIX}{model_cls.__tablename__}')
+                    session.exec(delete(BroadcastReceipt).where(BroadcastReceipt.user_id == user_id)) # type: ignore
+                    session.exec(
+                        delete(User).where(User.id == user_id, User.deleted_at != None) # type: ignore # noqa: E711
+                    ) # type: ignore
+                    session.commit()
+                    if modified:
+                        # A missing version is replaced by a fresh one, invalidating the cached responses
+                        redis.delete(*modified)
+                except LockError:
+                    raise
+                except Exception as ex:
+                    session.rollback()
+                    logger.error(f'Failed to purge deleted user {user_id}: {ex}')
+                    continue
+                logger.info(f'Purged deleted user {user_id} and {removed} notifications')
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logger.warning('User purge lock expired before the run finished')
@@ -0,0 +1,76 @@
+"""
+Compare requests/sec of the pure ASGI `TracingMiddleware` against the previous
+`BaseHTTPMiddleware` implementation on a trivial endpoint.
+
+Run inside the testing container:
+
+    docker compose run --rm testing uv run python benchmarks/tracing_middleware.py -n 5000
+"""
+import asyncio
+import time
+
+import click
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from api.middlewares.tracing import TracingMiddleware
+
+
+class BaseHTTPTracingMiddleware(BaseHTTPMiddleware):
+    """Equivalent of the middleware before it was rewritten as raw ASGI."""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        response.headers['X-Trace-ID'] = '0'
+        response.headers['X-Elapsed-Time'] = f'{elapsed_ms:.2f}ms'
+        return response
+
+
+def make_app(middleware: type | None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/ping')
+    async def ping():
+        return PlainTextResponse('pong')
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+async def measure(app: FastAPI, num: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            async with semaphore:
+                response = await client.get('/ping')
+                assert response.status_code == 200
+
+        await request()  # warm up
+        start = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(num)))
+        return num / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option('-n', '--num', default=2000, help='Requests per variant')
+@click.option('-c', '--concurrency', default=50, help='Concurrent in-flight requests')
+def main(num: int, concurrency: int):
+    variants = {
+        'no middleware': None,
+        'BaseHTTPMiddleware': BaseHTTPTracingMiddleware,
+        'pure ASGI': TracingMiddleware,
+    }
+    for name, middleware in variants.items():
+        rps = asyncio.run(measure(make_app(middleware), num, concurrency))
+        click.echo(f'{name:<20} {rps:>10.1f} req/s')
+
+
+if __name__ == '__main__':
+    main()
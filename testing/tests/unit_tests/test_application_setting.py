@@ -110,3 +110,13 @@ def test_application_setting_crud(
             f'/api/application_settings/{application_setting_id}'
         )
         assert verify_delete_response.status == 404
+
+
+def test_notification_retention_settings_seeded(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('system')
+
+    response = client.get('/api/application_settings', params={'limit': 100})
+    assert response.status == 200
+    settings = {row['name']: row['value'] for row in response.json()['data']}
+    assert settings['notification_retention_days'].isdigit()
+    assert settings['notification_retention_mode'] in {'archive', 'delete', 'off'}
@@ -0,0 +1,40 @@
+import json
+
+from playwright.sync_api import APIRequestContext
+
+
+def test_large_json_is_compressed(api_client: APIRequestContext):
+    response = api_client.get('/api/openapi.json', headers={'Accept-Encoding': 'gzip'})
+    assert response.status == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'accept-encoding' in response.headers['vary'].lower()
+    assert response.json()['openapi']
+
+
+def test_small_response_is_not_compressed(api_client: APIRequestContext):
+    response = api_client.get('/api/users', headers={'Accept-Encoding': 'gzip'})
+    assert response.status == 401
+    assert 'content-encoding' not in response.headers
+
+
+def test_identity_only_client(api_client: APIRequestContext):
+    response = api_client.get('/api/openapi.json', headers={'Accept-Encoding': 'identity'})
+    assert 'content-encoding' not in response.headers
+
+
+def test_streamed_export_is_compressed(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('system')
+
+    response = client.get('/api/users/export?format=ndjson', headers={'Accept-Encoding': 'gzip'})
+    assert response.status == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    assert all(json.loads(line)['id'] for line in response.text().splitlines())
+
+
+def test_openapi_conditional_get(api_client: APIRequestContext):
+    response = api_client.get('/api/openapi.json')
+    assert response.status == 200
+    etag = response.headers['etag']
+
+    response = api_client.get('/api/openapi.json', headers={'If-None-Match': etag})
+    assert response.status == 304
@@ -0,0 +1,37 @@
+import csv
+import io
+import json
+
+from playwright.sync_api import APIRequestContext
+
+
+def test_export_users_ndjson(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('system')
+
+    total = client.get('/api/users').json()['total']
+    response = client.get('/api/users/export?format=ndjson')
+    assert response.status == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+
+    rows = [json.loads(line) for line in response.text().splitlines()]
+    assert len(rows) == total
+    assert all('password' not in row for row in rows)
+
+
+def test_export_users_csv_with_filters(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('system')
+
+    filters = json.dumps([{'field': 'role', 'operator': '==', 'value': 'system'}])
+    response = client.get('/api/users/export', params={'format': 'csv', 'filters': filters})
+    assert response.status == 200
+
+    rows = list(csv.DictReader(io.StringIO(response.text())))
+    assert rows
+    assert all(row['role'] == 'system' for row in rows)
+
+
+def test_export_requires_read_permission(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('user')
+
+    response = client.get('/api/application_settings/export')
+    assert response.status == 403
@@ -0,0 +1,34 @@
+from playwright.sync_api import APIRequestContext
+
+from api.metrics import Counter, Histogram
+
+
+def test_histogram_exposition():
+    histogram = Histogram('job_seconds', 'Job time', ('queue',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, queue='email')
+    histogram.observe(0.5, queue='email')
+    histogram.observe(5, queue='email')
+
+    lines = histogram.render()
+    assert lines[:2] == ['# HELP job_seconds Job time', '# TYPE job_seconds histogram']
+    assert 'job_seconds_bucket{queue="email",le="0.1"} 1' in lines
+    assert 'job_seconds_bucket{queue="email",le="1.0"} 2' in lines
+    assert 'job_seconds_bucket{queue="email",le="+Inf"} 3' in lines
+    assert 'job_seconds_count{queue="email"} 3' in lines
+
+
+def test_counter_label_escaping():
+    counter = Counter('hits_total', 'Hits', ('route',))
+    counter.inc(route='/a"b')
+    assert list(counter.samples()) == ['hits_total{route="/a\\"b"} 1.0']
+
+
+def test_metrics_endpoint(api_client: APIRequestContext):
+    api_client.get('/api/docs')
+    response = api_client.get('/api/metrics')
+    assert response.status == 200
+
+    body = response.text()
+    assert 'http_request_duration_seconds_bucket' in body
+    assert 'db_pool_checked_out{engine="async"}' in body
+    assert 'rq_queue_jobs{queue="email",state="queued"}' in body
@@ -155,3 +155,67 @@ def test_notification_not_owner(
             f'/api/notifications/{random_id}'
         )
         assert get_one_response.status == 404
+
+
+def test_notification_date_range(authenticated_api_client):
+    """
+    Verify `since`/`until` bound the listed notifications by creation date.
+    """
+    client: APIRequestContext = authenticated_api_client('user')
+
+    response = client.get('/api/notifications', params={'since': '2000-01-01T00:00:00'})
+    assert response.status == 200
+    assert response.json()['total'] > 0
+
+    response = client.get('/api/notifications', params={'until': '2000-01-01T00:00:00'})
+    assert response.status == 200
+    assert response.json()['total'] == 0
+
+
+def test_notification_see_all(authenticated_api_client):
+    """
+    Verify see_all only updates unseen notifications and reports how many changed.
+    """
+    client: APIRequestContext = authenticated_api_client('user')
+
+    response = client.patch('/api/notifications/see_all', params={'before': '2000-01-01T00:00:00'})
+    assert response.status == 200
+    assert response.json()['updated'] == 0
+
+    response = client.patch('/api/notifications/see_all')
+    assert response.status == 200
+    assert response.json()['success']
+
+    response = client.patch('/api/notifications/see_all')
+    assert response.status == 200
+    assert response.json()['updated'] == 0
+
+
+@pytest.mark.parametrize(
+    'user_key',
+    USERS.keys(),
+)
+def test_notification_feed(authenticated_api_client, user_key: str):
+    """
+    Verify the feed pages through personal notifications and broadcasts by cursor.
+    """
+    client: APIRequestContext = authenticated_api_client(user_key)
+
+    seen_ids = []
+    cursor = None
+    for _ in range(3):
+        params = {'limit': 2} | ({'cursor': cursor} if cursor else {})
+        response = client.get('/api/notifications/feed', params=params)
+        assert response.status == 200
+        page = response.json()
+        assert len(page['data']) <= 2
+        seen_ids += [item['id'] for item in page['data']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert len(seen_ids) > 0
+    assert len(seen_ids) == len(set(seen_ids))
+
+    response = client.get('/api/notifications/feed', params={'cursor': 'not a cursor'})
+    assert response.status == 400
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+from loguru import logger
+from sqlalchemy import create_engine, exc
+
+from api.database.pool import TimedQueuePool, pool_holder
+from api.metrics import DB_POOL_CONNECTION_HOLD
+
+
+@pytest.fixture
+def small_pool_engine(tmp_path):
+    engine = create_engine(
+        f'sqlite:///{tmp_path / "pool.db"}',
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    engine.pool.metrics_name = 'test' # type: ignore
+    engine.pool.slow_checkout_ms = 50 # type: ignore
+    yield engine
+    engine.dispose()
+
+
+def test_slow_checkout_logs_holders(small_pool_engine):
+    messages = []
+    sink_id = logger.add(messages.append, level='WARNING', format='{message}')
+    token = pool_holder.set('GET /users trace_id=abc')
+    try:
+        with small_pool_engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                small_pool_engine.connect()
+    finally:
+        pool_holder.reset(token)
+        logger.remove(sink_id)
+
+    assert len(messages) == 1
+    assert 'Pool `test` checkout waited' in messages[0]
+    assert 'GET /users trace_id=abc' in messages[0]
+    assert small_pool_engine.pool.holders == {}
+
+
+def test_hold_time_observed_on_return(small_pool_engine):
+    def held():
+        return [(total, count) for key, _, total, count in DB_POOL_CONNECTION_HOLD.collect() if key == ('test',)]
+
+    before = held()
+    with small_pool_engine.connect():
+        time.sleep(0.05)
+
+    total, count = held()[0]
+    previous_total, previous_count = before[0] if before else (0.0, 0)
+    assert count == previous_count + 1
+    assert total - previous_total >= 0.05
@@ -0,0 +1,52 @@
+import pytest
+from playwright.sync_api import APIRequestContext
+
+
+# Maximum SQL statements each endpoint may run, authentication included
+QUERY_BUDGETS = {
+    '/api/auth/me': 4,
+    '/api/users': 5,
+    '/api/users/1': 4,
+    '/api/notifications': 5,
+    '/api/application_settings': 5,
+    '/api/role_access_controls': 5,
+    '/api/templates': 5,
+    '/api/permissions': 3,
+}
+
+# Identical statement shapes allowed per request before it is treated as an N+1
+REPEAT_BUDGET = 1
+
+
+@pytest.mark.parametrize(
+    'path, budget',
+    QUERY_BUDGETS.items(),
+)
+def test_query_budget(
+    authenticated_api_client,
+    path: str,
+    budget: int,
+):
+    """
+    Verify endpoints stay within their SQL statement budget.
+    """
+    client: APIRequestContext = authenticated_api_client('system')
+
+    response = client.get(path)
+    assert response.status == 200, response.text()
+
+    query_count = int(response.headers['x-db-query-count'])
+    repeated = int(response.headers['x-db-repeated-statements'])
+    assert query_count <= budget, f'{path} executed {query_count} statements, budget is {budget}'
+    assert repeated <= REPEAT_BUDGET, f'{path} repeated {repeated} statements'
+
+
+def test_connection_time_header(authenticated_api_client):
+    """
+    Verify responses report how long the request kept database connections checked out.
+    """
+    client: APIRequestContext = authenticated_api_client('system')
+
+    response = client.get('/api/users')
+    assert response.status == 200
+    assert float(response.headers['x-db-connection-time'].removesuffix('ms')) > 0
@@ -0,0 +1,49 @@
+import asyncio
+
+from api.database.models.application_setting import ApplicationSetting
+from api.routes.utils import querycache
+
+
+def test_memory_backend_lru_and_invalidation():
+    backend = querycache.MemoryBackend(max_entries=2)
+
+    async def scenario():
+        await backend.set('a', '-', {'id': 1}, ttl=60)
+        await backend.set('b', '-', {'id': 2}, ttl=60)
+        await backend.get_many(['a'], '-')  # `a` becomes most recently used
+        await backend.set('c', '-', {'id': 3}, ttl=60)
+        assert await backend.get_many(['a', 'b', 'c'], '-') == [{'id': 1}, None, {'id': 3}]
+
+        await backend.set('a', 'filtered', {'id': 1}, ttl=60)
+        await backend.delete(['a'])
+        assert await backend.get_many(['a'], '-') == [None]
+        assert await backend.get_many(['a'], 'filtered') == [None]
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_misses_run_one_query():
+    querycache.register(ApplicationSetting, backend=querycache.MemoryBackend(), ttl=60)
+    calls = []
+
+    async def query(ids):
+        calls.append(ids)
+        await asyncio.sleep(0.05)
+        return []
+
+    def transform(q):
+        return q.where(ApplicationSetting.name == 'missing')
+
+    async def scenario():
+        return await asyncio.gather(*(
+            querycache.fetch_many(None, ApplicationSetting, [1], transform, query)  # type: ignore
+            for _ in range(5)
+        ))
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        querycache.registry.pop(ApplicationSetting, None)
+
+    assert calls == [[1]]
+    assert results == [[]] * 5
@@ -0,0 +1,24 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from api.database.querystats import instrument_engine, start_query_stats, stop_query_stats
+
+
+def test_failed_statement_does_not_skew_later_timings(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "stats.db"}')
+    instrument_engine(engine)
+    stats, token = start_query_stats()
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(exc.OperationalError):
+                conn.execute(text('SELECT * FROM missing_table'))
+            time.sleep(0.05)
+            conn.execute(text('SELECT 1'))
+    finally:
+        stop_query_stats(token)
+        engine.dispose()
+
+    assert stats.count == 1
+    assert stats.total_ms < 50
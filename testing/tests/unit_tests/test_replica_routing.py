@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import column, create_engine, insert, select, table, text
+
+from api.database.routing import (
+    REPLICA_ALLOWED,
+    Replica,
+    ReplicaSet,
+    RoutingSession,
+    read_replica,
+)
+
+
+items = table('items', column('name'))
+
+
+def make_engine(name: str):
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE items (name TEXT)'))
+        conn.execute(insert(items).values(name=name))
+    return engine
+
+
+@pytest.fixture
+def routing_session(monkeypatch):
+    primary = make_engine('primary')
+    replica = Replica('replica0', SimpleNamespace(sync_engine=make_engine('replica'))) # type: ignore
+    replica_set = ReplicaSet([replica], max_lag=5, check_interval=5)
+    monkeypatch.setattr(RoutingSession, 'replica_set', replica_set)
+
+    with RoutingSession(primary) as session:
+        session.info[REPLICA_ALLOWED] = True
+        yield session, replica
+
+
+def read_name(session) -> str:
+    return session.execute(select(items.c.name)).scalar_one()
+
+
+def test_reads_go_to_replica_only_inside_read_replica(routing_session):
+    session, _ = routing_session
+    assert read_name(session) == 'primary'
+    with read_replica(session):
+        assert read_name(session) == 'replica'
+
+
+def test_unhealthy_replica_falls_back_to_primary(routing_session):
+    session, replica = routing_session
+    replica.healthy = False
+    with read_replica(session):
+        assert read_name(session) == 'primary'
+
+
+def test_reads_stick_to_primary_after_write(routing_session):
+    session, _ = routing_session
+    session.execute(insert(items).values(name='written'))
+    with read_replica(session):
+        names = session.execute(select(items.c.name)).scalars().all()
+    assert 'written' in names
+
+
+def test_write_requests_never_use_replica(routing_session):
+    session, _ = routing_session
+    session.info[REPLICA_ALLOWED] = False
+    with read_replica(session):
+        assert read_name(session) == 'primary'
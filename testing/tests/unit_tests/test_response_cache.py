@@ -0,0 +1,43 @@
+from faker import Faker
+from playwright.sync_api import APIRequestContext
+
+
+def test_conditional_get_and_invalidation(authenticated_api_client):
+    """
+    Verify cacheable endpoints answer `If-None-Match` with 304 until the table changes.
+    """
+    client: APIRequestContext = authenticated_api_client('system')
+    faker = Faker()
+
+    first = client.get('/api/application_settings')
+    assert first.status == 200
+    etag = first.headers['etag']
+
+    not_modified = client.get('/api/application_settings', headers={'If-None-Match': etag})
+    assert not_modified.status == 304
+
+    other_query = client.get('/api/application_settings?limit=1', headers={'If-None-Match': etag})
+    assert other_query.status == 200
+
+    create_response = client.post(
+        '/api/application_settings',
+        data={'name': faker.name(), 'value': faker.word()},
+    )
+    assert create_response.status == 200
+
+    modified = client.get('/api/application_settings', headers={'If-None-Match': etag})
+    assert modified.status == 200
+    assert modified.headers['etag'] != etag
+    assert modified.json()['total'] == first.json()['total'] + 1
+
+    client.delete(f"/api/application_settings/{create_response.json()['id']}")
+
+
+def test_permissions_etag(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('system')
+
+    first = client.get('/api/permissions')
+    assert first.status == 200
+
+    second = client.get('/api/permissions', headers={'If-None-Match': first.headers['etag']})
+    assert second.status == 304
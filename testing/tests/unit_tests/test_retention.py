@@ -0,0 +1,123 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from api.constants import ApplicationSettings, RetentionMode
+from api.database.models.application_setting import ApplicationSetting
+from api.database.models.notification import Notification
+from api.database.models.notification_archive import NotificationArchive
+from api.worker.tasks.retention import purge_notifications, retention_policy
+
+
+class FakeRedis:
+    def __init__(self, *args, **kwargs):
+        self.values = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return False
+        self.values[key] = value
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def expire(self, key, ttl):
+        pass
+
+
+@pytest.fixture
+def retention_engine(tmp_path, monkeypatch):
+    engine = create_engine(f'sqlite:///{tmp_path / "retention.db"}')
+    SQLModel.metadata.create_all(engine, tables=[
+        ApplicationSetting.__table__, # type: ignore
+        Notification.__table__, # type: ignore
+        NotificationArchive.__table__, # type: ignore
+    ])
+
+    @contextmanager
+    def get_sync_session():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr('api.database.get_sync_session', get_sync_session)
+    monkeypatch.setattr('api.metrics.InstrumentedRedis', FakeRedis)
+    monkeypatch.setattr('api.settings.settings.NOTIFICATION_RETENTION_BATCH_PAUSE_S', 0)
+    yield engine
+    engine.dispose()
+
+
+def seed(engine, mode: str):
+    old = datetime.now() - timedelta(days=60)
+    with Session(engine) as session:
+        session.add(ApplicationSetting(name=ApplicationSettings.NOTIFICATION_RETENTION_DAYS, value='30'))
+        session.add(ApplicationSetting(name=ApplicationSettings.NOTIFICATION_RETENTION_MODE, value=mode))
+        for seen, created_at in ((True, old), (False, old), (True, datetime.now())):
+            session.add(Notification(
+                user_id=1,
+                triggered_by=1,
+                title='Title',
+                body='Body',
+                category='info',
+                seen=seen,
+                created_at=created_at,
+            ))
+        session.commit()
+
+
+@pytest.mark.parametrize('days, mode', [
+    ('thirty', 'delete'),
+    ('30', 'Archive'),
+    ('30', None),
+])
+def test_retention_policy_invalid_values_turn_retention_off(days, mode):
+    values = {ApplicationSettings.NOTIFICATION_RETENTION_DAYS: days}
+    if mode is not None:
+        values[ApplicationSettings.NOTIFICATION_RETENTION_MODE] = mode
+    assert retention_policy(values) == (0, RetentionMode.OFF)
+
+
+def test_retention_policy_valid_values():
+    values = {
+        ApplicationSettings.NOTIFICATION_RETENTION_DAYS: '30',
+        ApplicationSettings.NOTIFICATION_RETENTION_MODE: 'archive',
+    }
+    assert retention_policy(values) == (30, RetentionMode.ARCHIVE)
+
+
+def test_purge_notifications_archive(retention_engine):
+    seed(retention_engine, 'archive')
+    purge_notifications()
+
+    with Session(retention_engine) as session:
+        remaining = session.exec(select(Notification)).all()
+        archived = session.exec(select(NotificationArchive)).all()
+    assert len(remaining) == 2
+    assert all(not n.seen or n.created_at > datetime.now() - timedelta(days=30) for n in remaining)
+    assert len(archived) == 1
+    assert archived[0].seen
+
+
+def test_purge_notifications_delete(retention_engine):
+    seed(retention_engine, 'delete')
+    purge_notifications()
+
+    with Session(retention_engine) as session:
+        remaining = session.exec(select(Notification)).all()
+        archived = session.exec(select(NotificationArchive)).all()
+    assert len(remaining) == 2
+    assert archived == []
+
+
+def test_purge_notifications_invalid_mode_is_off(retention_engine):
+    seed(retention_engine, 'sometimes')
+    purge_notifications()
+
+    with Session(retention_engine) as session:
+        remaining = session.exec(select(Notification)).all()
+    assert len(remaining) == 3
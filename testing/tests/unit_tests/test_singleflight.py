@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from api.routes.utils.singleflight import SingleFlight
+
+
+def test_identical_calls_run_once():
+    flights = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return 'result'
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do('key', compute) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == ['result'] * 10
+    assert calls == 1
+    assert len(flights) == 0
+
+
+def test_errors_are_shared():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do('key', fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_waiter_takes_over_when_leader_is_cancelled():
+    flights = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    async def scenario():
+        leader = asyncio.create_task(flights.do('key', compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do('key', compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(scenario()) == 2
@@ -0,0 +1,22 @@
+from playwright.sync_api import APIRequestContext
+
+
+def test_static_files_are_cacheable(api_client: APIRequestContext):
+    response = api_client.get('/api/static/brand.png')
+    assert response.status == 200
+    assert 'must-revalidate' in response.headers['cache-control']
+    etag = response.headers['etag']
+
+    response = api_client.get('/api/static/brand.png', headers={'If-None-Match': etag})
+    assert response.status == 304
+
+
+def test_static_range_request(api_client: APIRequestContext):
+    response = api_client.get('/api/static/brand.png', headers={'Range': 'bytes=0-7'})
+    assert response.status == 206
+    assert response.body() == b'\x89PNG\r\n\x1a\n'
+
+
+def test_staged_uploads_are_not_served(api_client: APIRequestContext):
+    response = api_client.get('/api/static/profiles/incoming/anything')
+    assert response.status == 404
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+from sqlalchemy import create_engine, text
+
+from api.middlewares.sampling import exclude_sql_statements
+from api.middlewares.tracing import build_tracer_provider
+from api.settings import settings
+
+
+def make_provider(**overrides):
+    exporter = InMemorySpanExporter()
+    config = settings.model_copy(update=overrides)
+    provider = build_tracer_provider(exporter, config)
+    return provider, exporter
+
+
+def test_head_sampling_ratio():
+    provider, exporter = make_provider(TRACE_SAMPLE_RATIO=0.0)
+    tracer = provider.get_tracer(__name__)
+    for _ in range(10):
+        with tracer.start_as_current_span('request'):
+            pass
+
+    provider.force_flush()
+    assert exporter.get_finished_spans() == ()
+
+
+def test_tail_retention_keeps_errors_and_slow_traces():
+    provider, exporter = make_provider(
+        TRACE_TAIL_ENABLED=True,
+        TRACE_TAIL_SLOW_MS=50,
+        TRACE_TAIL_BASELINE_RATIO=0.0,
+    )
+    tracer = provider.get_tracer(__name__)
+
+    with tracer.start_as_current_span('fast'):
+        with tracer.start_as_current_span('fast.child'):
+            pass
+
+    with tracer.start_as_current_span('error'):
+        with tracer.start_as_current_span('error.child') as child:
+            child.set_status(Status(StatusCode.ERROR))
+
+    with tracer.start_as_current_span('slow'):
+        time.sleep(0.06)
+
+    provider.force_flush()
+    names = {span.name for span in exporter.get_finished_spans()}
+    assert names == {'error', 'error.child', 'slow'}
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = create_engine('sqlite://')
+    yield engine
+    SQLAlchemyInstrumentor().uninstrument()
+    engine.dispose()
+
+
+def test_sql_span_exclusion(sqlite_engine):
+    provider, exporter = make_provider()
+    exclude_sql_statements(sqlite_engine, [r'^SELECT 1\b'])
+    SQLAlchemyInstrumentor().instrument(engine=sqlite_engine, tracer_provider=provider)
+
+    with sqlite_engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+        conn.execute(text('SELECT 2'))
+
+    provider.force_flush()
+    statements = [span.attributes.get('db.statement') for span in exporter.get_finished_spans()]
+    assert 'SELECT 2' in statements
+    assert 'SELECT 1' not in statements
@@ -1,5 +1,11 @@
+import base64
+import hashlib
+import io
+import json
+
 import pytest
 from faker import Faker
+from PIL import Image
 from playwright.sync_api import APIRequestContext
 
 from testing.fixtures import USERS
@@ -140,3 +146,91 @@ def test_user_crud(
             f'/api/users/{user_id}'
         )
         assert verify_delete_response.status == 404
+
+
+def test_user_profile_image_is_content_addressed(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('system')
+    faker = Faker()
+
+    image = io.BytesIO()
+    Image.new('RGB', (800, 600), faker.color()).save(image, 'PNG')
+    digest = hashlib.sha256(image.getvalue()).hexdigest()
+    profile = 'data:image/png;base64,' + base64.b64encode(image.getvalue()).decode()
+
+    response = client.post(
+        '/api/users',
+        data={'name': faker.name(), 'email': faker.unique.email(), 'password': 'password', 'profile': profile},
+    )
+    assert response.status == 200, response.text()
+    assert response.json()['profile'] == f'/static/profiles/{digest}_256.webp'
+
+    response = client.post(
+        '/api/users',
+        data={
+            'name': faker.name(),
+            'email': faker.unique.email(),
+            'password': 'password',
+            'profile': 'bm90IGFuIGltYWdl',
+        },
+    )
+    assert response.status == 400
+
+
+def test_user_profile_multipart_upload(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('system')
+    faker = Faker()
+
+    response = client.post(
+        '/api/users',
+        data={'name': faker.name(), 'email': faker.unique.email(), 'password': 'password'},
+    )
+    assert response.status == 200, response.text()
+    user_id = response.json()['id']
+
+    image = io.BytesIO()
+    Image.new('RGB', (300, 300), 'teal').save(image, 'JPEG')
+    digest = hashlib.sha256(image.getvalue()).hexdigest()
+
+    response = client.post(
+        f'/api/users/{user_id}/profile',
+        multipart={'file': {'name': 'avatar.jpg', 'mimeType': 'image/jpeg', 'buffer': image.getvalue()}},
+    )
+    assert response.status == 200, response.text()
+    assert response.json()['profile'] == f'/static/profiles/{digest}_256.webp'
+
+    response = client.post(
+        f'/api/users/{user_id}/profile',
+        multipart={
+            'file': {'name': 'avatar.jpg', 'mimeType': 'image/jpeg', 'buffer': b'#!/bin/sh\necho not an image\n'},
+        },
+    )
+    assert response.status == 415
+
+
+def test_user_bulk_delete(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('system')
+    faker = Faker()
+
+    ids = []
+    for _ in range(3):
+        response = client.post(
+            '/api/users',
+            data={'name': faker.name(), 'email': faker.unique.email(), 'password': 'password'},
+        )
+        assert response.status == 200
+        ids.append(response.json()['id'])
+
+    response = client.delete('/api/users', params={'filter': json.dumps({'id': ids})})
+    assert response.status == 200
+    assert sorted(response.json()) == sorted(ids)
+
+    for id in ids:
+        assert client.get(f'/api/users/{id}').status == 404
+
+    # Already deleted users are skipped
+    response = client.delete('/api/users', params={'filter': json.dumps({'id': ids})})
+    assert response.status == 200
+    assert response.json() == []
+
+    response = client.delete('/api/users', params={'filter': 'not json'})
+    assert response.status == 400
@@ -0,0 +1,65 @@
+import json
+
+from faker import Faker
+from playwright.sync_api import APIRequestContext
+
+
+def test_import_users_csv(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('system')
+    faker = Faker()
+
+    emails = [faker.unique.email() for _ in range(3)]
+    body = 'name,email,password\n'
+    body += ''.join(f'"{faker.name()}",{email},{faker.password()}\n' for email in emails)
+    # duplicate within the file and a row missing the required email
+    body += f'Dup,{emails[0]},secret\n'
+    body += 'No Email,,secret\n'
+
+    response = client.post(
+        '/api/users/import?format=csv&chunk_size=2',
+        data=body,
+        headers={'Content-Type': 'text/csv'},
+    )
+    assert response.status == 200
+    report = response.json()
+    assert report['total'] == 5
+    assert report['inserted'] == 3
+    assert [error['row'] for error in report['errors']] == [4, 5]
+
+    filters = json.dumps([{'field': 'email', 'operator': 'in', 'value': emails}])
+    users = client.get('/api/users', params={'filters': filters}).json()
+    assert users['total'] == 3
+
+    # Importing the same rows again reports every one as existing
+    response = client.post('/api/users/import?format=csv', data=body, headers={'Content-Type': 'text/csv'})
+    report = response.json()
+    assert report['inserted'] == 0
+    assert all(error['row'] == 5 or error['error'] == 'Email already exists' for error in report['errors'])
+
+
+def test_import_users_jsonl_reports_invalid_lines(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('system')
+    faker = Faker()
+
+    lines = [
+        json.dumps({'name': faker.name(), 'email': faker.unique.email(), 'password': faker.password()}),
+        '{not json',
+        json.dumps({'email': faker.unique.email()}),
+    ]
+    response = client.post(
+        '/api/users/import?format=jsonl',
+        data='\n'.join(lines),
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+    assert response.status == 200
+    report = response.json()
+    assert report['total'] == 3
+    assert report['inserted'] == 1
+    assert [error['row'] for error in report['errors']] == [2, 3]
+
+
+def test_import_users_requires_create_permission(authenticated_api_client):
+    client: APIRequestContext = authenticated_api_client('user')
+
+    response = client.post('/api/users/import', data='name,email\n', headers={'Content-Type': 'text/csv'})
+    assert response.status == 403
@@ -33,8 +33,8 @@ const NotificationMenuContent = () => {
     data: notifications,
     isLoading: notificationsLoading,
     refetch,
-  } = useGetList("notifications", {
-    sort: { field: "created_at", order: "DESC" },
+  } = useGetList("notifications/feed", {
+    pagination: { page: 1, perPage: 20 },
   });
 
   if (notificationsLoading) return null;
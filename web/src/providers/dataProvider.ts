@@ -37,6 +37,9 @@ export const dataProvider: DataProvider = withLifecycleCallbacks(
         query["offset"] = ((page - 1) * perPage).toString();
         query["limit"] = perPage.toString();
       }
+      if (params.meta?.cursor !== undefined) {
+        query["cursor"] = params.meta.cursor;
+      }
       if (params.filter !== undefined) {
         const operators = {
           _neq: "!=",
@@ -73,6 +76,18 @@ export const dataProvider: DataProvider = withLifecycleCallbacks(
       const url = `${API_URL}/${resource}?${stringify(query)}`;
       const { json } = await httpClient(url, { signal: params.signal });
 
+      if (json.next_cursor !== undefined) {
+        // Keyset paginated resources have no total
+        return {
+          data: json.data,
+          pageInfo: {
+            hasNextPage: json.next_cursor !== null,
+            hasPreviousPage: params.meta?.cursor !== undefined,
+          },
+          meta: { nextCursor: json.next_cursor },
+        };
+      }
+
       return {
         data: json.data,
         total: json.total,